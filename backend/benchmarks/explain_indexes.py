@@ -0,0 +1,182 @@
+"""EXPLAIN-планы и задержки запросов списков до и после индексов.
+
+Запускается из каталога backend против отдельной базы:
+
+    POSTGRES_CONN=postgresql://... python -m benchmarks.explain_indexes --seed
+
+Индексы из models.py удаляются, снимаются планы и время, затем индексы
+создаются заново и замеры повторяются.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+import database
+import models
+
+SEED_SQL = [
+    """
+    INSERT INTO employee (id, username)
+    SELECT gen_random_uuid(), 'bench_user_' || g FROM generate_series(1, :users) g
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO organization (id, name)
+    SELECT gen_random_uuid(), 'bench_org_' || g FROM generate_series(1, :orgs) g
+    """,
+    """
+    WITH e AS (
+        SELECT array_agg(id) AS ids FROM employee WHERE username LIKE 'bench_user_%'
+    ), o AS (
+        SELECT array_agg(id) AS ids FROM organization WHERE name LIKE 'bench_org_%'
+    )
+    INSERT INTO tender (id, name, description, "organizationId", creator_id,
+                        "serviceType", status, version, created_at)
+    SELECT gen_random_uuid(), 'Tender ' || md5(g::text), 'bench',
+           o.ids[1 + g % array_length(o.ids, 1)],
+           e.ids[1 + g % array_length(e.ids, 1)],
+           (ARRAY['Construction', 'Delivery', 'Manufacture'])[1 + g % 3],
+           'Published', 1, now() - g * interval '1 second'
+    FROM generate_series(1, :tenders) g, e, o
+    """,
+    """
+    WITH e AS (
+        SELECT array_agg(id) AS ids FROM employee WHERE username LIKE 'bench_user_%'
+    )
+    INSERT INTO bid (id, name, description, tender_id, organization_id,
+                     author_id, status, version, created_at)
+    SELECT gen_random_uuid(), 'Bid ' || g, 'bench', t.id, t."organizationId",
+           e.ids[1 + (abs(hashtext(t.id::text)) + g) % array_length(e.ids, 1)],
+           'Published', 1, t.created_at + g * interval '1 minute'
+    FROM tender t, generate_series(1, :bids_per_tender) g, e
+    WHERE t.description = 'bench'
+    """,
+    """
+    INSERT INTO bid_feedback (id, bid_id, username, feedback)
+    SELECT gen_random_uuid(), b.id, 'bench_user_1', 'bench'
+    FROM bid b WHERE b.description = 'bench' AND random() < 0.2
+    """,
+]
+
+QUERIES = {
+    "tenders": """
+        SELECT * FROM tender ORDER BY name, id LIMIT 5 OFFSET :offset
+    """,
+    "tenders_by_service_type": """
+        SELECT * FROM tender WHERE "serviceType" = 'Delivery'
+        ORDER BY name, id LIMIT 5 OFFSET :offset
+    """,
+    "tenders_by_user": """
+        SELECT * FROM tender WHERE creator_id = :creator_id
+        ORDER BY name, id LIMIT 5 OFFSET :offset
+    """,
+    "bids_for_tender": """
+        SELECT * FROM bid WHERE tender_id = :tender_id
+        ORDER BY created_at, id LIMIT 5
+    """,
+    "bids_by_user": """
+        SELECT * FROM bid WHERE author_id = :author_id
+        ORDER BY created_at, id LIMIT 5 OFFSET :offset
+    """,
+    "feedback_by_bid": """
+        SELECT * FROM bid_feedback WHERE bid_id = :bid_id
+    """,
+}
+
+INDEXED_TABLES = [models.Tender, models.Bid, models.BidFeedback]
+
+
+def seed(conn, args):
+    for sql in SEED_SQL:
+        conn.execute(
+            text(sql),
+            dict(
+                users=args.users,
+                orgs=args.orgs,
+                tenders=args.tenders,
+                bids_per_tender=args.bids_per_tender,
+            ),
+        )
+    conn.commit()
+
+
+def sample_params(conn, args):
+    row = conn.execute(
+        text(
+            "SELECT t.creator_id, t.id, b.author_id, b.id FROM bid b "
+            "JOIN tender t ON t.id = b.tender_id "
+            "WHERE b.description = 'bench' LIMIT 1"
+        )
+    ).one()
+    return dict(
+        creator_id=row[0],
+        tender_id=row[1],
+        author_id=row[2],
+        bid_id=row[3],
+        offset=args.offset,
+    )
+
+
+def set_indexes(conn, enabled: bool):
+    for model in INDEXED_TABLES:
+        for index in model.__table__.indexes:
+            if enabled:
+                index.create(conn, checkfirst=True)
+            else:
+                index.drop(conn, checkfirst=True)
+    conn.execute(text("ANALYZE tender, bid, bid_feedback"))
+    conn.commit()
+
+
+def measure(conn, params, runs):
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = (
+            conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + sql), params)
+            .scalars()
+            .all()
+        )
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            conn.execute(text(sql), params).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = ("\n".join(plan), statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="заполнить базу")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--orgs", type=int, default=100)
+    parser.add_argument("--tenders", type=int, default=200_000)
+    parser.add_argument("--bids-per-tender", type=int, default=5)
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--plans", action="store_true", help="печатать планы")
+    args = parser.parse_args()
+
+    database.init_engines(sync=True)
+    with database.engine.connect() as conn:
+        if args.seed:
+            seed(conn, args)
+        params = sample_params(conn, args)
+
+        set_indexes(conn, enabled=False)
+        before = measure(conn, params, args.runs)
+        set_indexes(conn, enabled=True)
+        after = measure(conn, params, args.runs)
+
+    print(f"{'query':<26}{'before, ms':>12}{'after, ms':>12}")
+    for name in QUERIES:
+        print(f"{name:<26}{before[name][1]:>12.3f}{after[name][1]:>12.3f}")
+        if args.plans:
+            print(f"\n-- {name}: before\n{before[name][0]}")
+            print(f"-- {name}: after\n{after[name][0]}\n")
+
+
+if __name__ == "__main__":
+    main()
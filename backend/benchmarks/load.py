@@ -0,0 +1,481 @@
+"""Нагрузочный сценарий по всем маршрутам API.
+
+Запускается из каталога backend против работающего сервиса, базу которого
+заполнил benchmarks.seed с теми же параметрами масштаба:
+
+    python -m benchmarks.load --base-url http://localhost:8080 \
+        --concurrency 64 --duration 60 --tenders 1000000 --bids 10000000
+
+Каждый воркер в цикле выбирает операцию по весам и случайные сущности
+из засеянного диапазона (генератор с фиксированным --seed). В конце
+печатаются p50/p95/p99, число ошибок и пропускная способность по каждой
+операции. Ошибка — любой статус вне ожидаемых для операции (не только
+5xx), неожиданные статусы перечисляются после таблицы. Пишущие операции
+меняют данные: статусы, версии и решения по предложениям накапливаются
+от прогона к прогону.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+
+def seeded_id(prefix: str, n: int) -> str:
+    # Тот же md5(prefix || n)::uuid, что и в benchmarks.seed
+    return str(uuid.UUID(hashlib.md5(f"{prefix}:{n}".encode()).hexdigest()))
+
+
+class Dataset:
+    """Связи засеянных сущностей, вычисляемые по номеру строки."""
+
+    def __init__(self, args, rng: random.Random):
+        self.args = args
+        self.rng = rng
+
+    def user(self, n: int) -> str:
+        return f"load_user_{n}"
+
+    def tender(self):
+        n = self.rng.randint(1, self.args.tenders)
+        org = (n - 1) % self.args.orgs
+        owner = 1 + org * self.args.responsible % self.args.users
+        return seeded_id("tender", n), seeded_id("organization", org + 1), owner
+
+    def bid(self):
+        n = self.rng.randint(1, self.args.bids)
+        tender = (n - 1) % self.args.tenders
+        org = tender % self.args.orgs
+        author = 1 + n * 7919 % self.args.users
+        responsible = 1 + org * self.args.responsible % self.args.users
+        return (
+            seeded_id("bid", n),
+            seeded_id("tender", tender + 1),
+            seeded_id("organization", org + 1),
+            author,
+            responsible,
+        )
+
+
+async def op_list_tenders(c, d):
+    params = {"limit": d.rng.choice([5, 20, 50])}
+    if d.rng.random() < 0.5:
+        params["service_type"] = d.rng.choice(["Construction", "Delivery"])
+    return await c.get("/api/tenders", params=params)
+
+
+async def op_list_tenders_cursor(c, d):
+    r = await c.get("/api/tenders", params={"limit": 20})
+    cursor = r.headers.get("x-next-cursor")
+    if not cursor:
+        return r
+    return await c.get("/api/tenders", params={"limit": 20, "cursor": cursor})
+
+
+async def op_my_tenders(c, d):
+    _, _, owner = d.tender()
+    return await c.get("/api/tenders/my", params={"username": d.user(owner)})
+
+
+async def op_list_tenders_stats(c, d):
+    return await c.get("/api/tenders", params={"limit": 20, "with_stats": True})
+
+
+async def op_search_tenders(c, d):
+    params = {"q": d.rng.choice(["Tender", "load"]), "limit": 20}
+    if d.rng.random() < 0.5:
+        params["service_type"] = d.rng.choice(["Construction", "Delivery"])
+    r = await c.get("/api/tenders/search", params=params)
+    cursor = r.headers.get("x-next-cursor")
+    if not cursor:
+        return r
+    return await c.get("/api/tenders/search", params={**params, "cursor": cursor})
+
+
+async def op_tender_stats(c, d):
+    tender, _, _ = d.tender()
+    return await c.get(f"/api/tenders/{tender}/stats")
+
+
+async def op_tender_status(c, d):
+    tender, _, _ = d.tender()
+    return await c.get(f"/api/tenders/{tender}/status")
+
+
+async def op_tender_statuses(c, d):
+    ids = [d.tender()[0] for _ in range(100)]
+    return await c.post("/api/tenders/statuses", json=ids)
+
+
+async def op_tender_lookup(c, d):
+    ids = [d.tender()[0] for _ in range(20)]
+    return await c.post("/api/tenders/lookup", json=ids)
+
+
+async def op_set_tender_status(c, d):
+    tender, _, owner = d.tender()
+    return await c.put(
+        f"/api/tenders/{tender}/status",
+        params={"status": "Published", "username": d.user(owner)},
+    )
+
+
+async def op_new_tender(c, d):
+    _, org, owner = d.tender()
+    return await c.post(
+        "/api/tenders/new",
+        json={
+            "name": f"Load {d.rng.random():.6f}",
+            "description": "load",
+            "serviceType": "Delivery",
+            "organizationId": org,
+            "creatorUsername": d.user(owner),
+            "status": "Published",
+        },
+    )
+
+
+async def op_bulk_tenders(c, d):
+    _, org, owner = d.tender()
+    items = [
+        {
+            "name": f"Bulk {i}",
+            "organizationId": org,
+            "creatorUsername": d.user(owner),
+            "serviceType": "Manufacture",
+        }
+        for i in range(50)
+    ]
+    return await c.post("/api/tenders/bulk", json=items)
+
+
+async def op_edit_tender(c, d):
+    tender, _, owner = d.tender()
+    return await c.patch(
+        f"/api/tenders/{tender}/edit",
+        params={"username": d.user(owner), "description": f"edit {d.rng.random()}"},
+    )
+
+
+async def op_rollback_tender(c, d):
+    tender, _, owner = d.tender()
+    return await c.put(
+        f"/api/tenders/{tender}/rollback/1", params={"username": d.user(owner)}
+    )
+
+
+async def op_export_tenders(c, d):
+    since = datetime.now() - timedelta(seconds=d.rng.randint(60, 3600))
+    return await c.get(
+        "/api/tenders/export",
+        params={"created_from": since.isoformat(), "service_type": "Delivery"},
+    )
+
+
+async def op_new_bid(c, d):
+    _, tender, org, author, _ = d.bid()
+    return await c.post(
+        "/api/bids/new",
+        json={
+            "name": "Load bid",
+            "description": "load",
+            "tenderId": tender,
+            "organizationId": org,
+            "creatorUsername": d.user(author),
+        },
+    )
+
+
+async def op_bulk_bids(c, d):
+    _, tender, org, author, _ = d.bid()
+    items = [
+        {
+            "name": f"Bulk bid {i}",
+            "tenderId": tender,
+            "organizationId": org,
+            "creatorUsername": d.user(author),
+        }
+        for i in range(50)
+    ]
+    return await c.post("/api/bids/bulk", json=items)
+
+
+async def op_my_bids(c, d):
+    _, _, _, author, _ = d.bid()
+    return await c.get("/api/bids/my", params={"username": d.user(author)})
+
+
+async def op_search_bids(c, d):
+    _, _, _, author, _ = d.bid()
+    return await c.get(
+        "/api/bids/search",
+        params={"username": d.user(author), "q": d.rng.choice(["Bid", "load"])},
+    )
+
+
+async def op_bids_for_tender(c, d):
+    _, tender, _, _, responsible = d.bid()
+    return await c.get(
+        f"/api/bids/{tender}/list", params={"username": d.user(responsible)}
+    )
+
+
+async def op_bid_status(c, d):
+    bid, _, _, author, _ = d.bid()
+    return await c.get(f"/api/bids/{bid}/status", params={"username": d.user(author)})
+
+
+async def op_bid_statuses(c, d):
+    _, _, _, author, _ = d.bid()
+    ids = [d.bid()[0] for _ in range(100)]
+    return await c.post(
+        "/api/bids/statuses", params={"username": d.user(author)}, json=ids
+    )
+
+
+async def op_bid_lookup(c, d):
+    _, _, _, author, _ = d.bid()
+    ids = [d.bid()[0] for _ in range(20)]
+    return await c.post(
+        "/api/bids/lookup", params={"username": d.user(author)}, json=ids
+    )
+
+
+async def op_set_bid_status(c, d):
+    bid, _, _, author, _ = d.bid()
+    return await c.put(
+        f"/api/bids/{bid}/status",
+        params={"status": "Published", "username": d.user(author)},
+    )
+
+
+async def op_edit_bid(c, d):
+    bid, _, _, author, _ = d.bid()
+    return await c.patch(
+        f"/api/bids/{bid}/edit",
+        params={"username": d.user(author)},
+        json={"description": f"edit {d.rng.random()}"},
+    )
+
+
+async def op_rollback_bid(c, d):
+    bid, _, _, author, _ = d.bid()
+    return await c.put(
+        f"/api/bids/{bid}/rollback/1", params={"username": d.user(author)}
+    )
+
+
+async def op_submit_decision(c, d):
+    bid, _, _, _, responsible = d.bid()
+    return await c.put(
+        f"/api/bids/{bid}/submit_decision",
+        params={"decision": "Approved", "username": d.user(responsible)},
+    )
+
+
+async def op_feedback(c, d):
+    bid, _, _, _, responsible = d.bid()
+    return await c.put(
+        f"/api/bids/{bid}/feedback",
+        params={"username": d.user(responsible)},
+        json={"feedback": "load"},
+    )
+
+
+async def op_bulk_feedback(c, d):
+    _, _, _, _, responsible = d.bid()
+    items = [
+        {"bidId": d.bid()[0], "username": d.user(responsible), "feedback": f"bulk {i}"}
+        for i in range(50)
+    ]
+    return await c.post("/api/bids/feedback/bulk", json=items)
+
+
+async def op_bid_feedback(c, d):
+    bid, _, _, _, responsible = d.bid()
+    return await c.get(
+        f"/api/bids/{bid}/feedback", params={"username": d.user(responsible)}
+    )
+
+
+async def op_reviews(c, d):
+    _, tender, _, author, responsible = d.bid()
+    return await c.get(
+        f"/api/bids/{tender}/reviews",
+        params={
+            "authorUsername": d.user(author),
+            "requesterUsername": d.user(responsible),
+        },
+    )
+
+
+async def op_export_bids(c, d):
+    _, _, _, author, _ = d.bid()
+    return await c.get(
+        "/api/bids/export", params={"username": d.user(author), "format": "csv"}
+    )
+
+
+async def op_events(c, d):
+    tender, _, owner = d.tender()
+    # Подписка и первый кадр потока, затем отключение
+    async with c.stream(
+        "GET", "/api/events", params={"username": d.user(owner), "tenderId": tender}
+    ) as r:
+        async for _ in r.aiter_raw():
+            break
+    return r
+
+
+async def op_ready(c, d):
+    return await c.get("/api/ready")
+
+
+async def op_ping(c, d):
+    return await c.get("/api/ping")
+
+
+OK = {200}
+# Параллельная правка того же объекта без If-Match получает 409
+EDIT = {200, 409}
+# Откат к версии 1 ещё не правленного объекта — 400
+ROLLBACK = {200, 400, 409}
+
+# (операция, вес, ожидаемые статусы): чтения преобладают, как в рабочем
+# трафике
+OPERATIONS = [
+    (op_list_tenders, 30, OK),
+    (op_list_tenders_cursor, 5, OK),
+    (op_list_tenders_stats, 2, OK),
+    (op_search_tenders, 3, OK),
+    (op_my_tenders, 8, OK),
+    (op_tender_stats, 2, OK),
+    (op_tender_status, 10, OK),
+    (op_tender_statuses, 1, OK),
+    (op_tender_lookup, 1, OK),
+    (op_set_tender_status, 2, OK),
+    (op_new_tender, 2, OK),
+    (op_bulk_tenders, 0.2, OK),
+    (op_edit_tender, 2, EDIT),
+    (op_rollback_tender, 1, ROLLBACK),
+    (op_export_tenders, 0.2, OK),
+    (op_new_bid, 3, OK),
+    (op_bulk_bids, 0.2, OK),
+    (op_my_bids, 8, OK),
+    (op_search_bids, 2, OK),
+    (op_bids_for_tender, 8, OK),
+    (op_bid_status, 8, OK),
+    (op_bid_statuses, 1, OK),
+    (op_bid_lookup, 1, OK),
+    (op_set_bid_status, 2, OK),
+    (op_edit_bid, 2, EDIT),
+    (op_rollback_bid, 1, ROLLBACK),
+    (op_submit_decision, 1, OK),
+    (op_feedback, 2, OK),
+    (op_bulk_feedback, 0.2, OK),
+    (op_bid_feedback, 3, OK),
+    (op_reviews, 3, OK),
+    (op_export_bids, 0.2, OK),
+    (op_events, 0.5, OK),
+    (op_ready, 0.5, OK),
+    (op_ping, 1, OK),
+]
+
+
+async def worker(client, dataset, deadline, results):
+    operations, weights, _ = zip(*OPERATIONS)
+    expected = {operation: statuses for operation, _, statuses in OPERATIONS}
+    while time.perf_counter() < deadline:
+        (operation,) = dataset.rng.choices(operations, weights)
+        name = operation.__name__[3:]
+        started = time.perf_counter()
+        try:
+            status = (await operation(client, dataset)).status_code
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        failed = status not in expected[operation]
+        results[name].append((time.perf_counter() - started, failed, status))
+
+
+def percentile(timings, q: int) -> float:
+    if len(timings) < 2:
+        return timings[0] if timings else 0.0
+    return statistics.quantiles(timings, n=100, method="inclusive")[q - 1]
+
+
+def report(results, elapsed: float):
+    print(
+        f"{'operation':<22}{'count':>8}{'errors':>8}{'rps':>9}"
+        f"{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}"
+    )
+    everything = []
+    unexpected = {}
+    for name, samples in sorted(results.items()):
+        timings = [t * 1000 for t, _, _ in samples]
+        errors = sum(failed for _, failed, _ in samples)
+        if errors:
+            unexpected[name] = Counter(
+                status for _, failed, status in samples if failed
+            )
+        everything.extend(timings)
+        print(
+            f"{name:<22}{len(samples):>8}{errors:>8}{len(samples) / elapsed:>9.1f}"
+            f"{percentile(timings, 50):>10.1f}{percentile(timings, 95):>10.1f}"
+            f"{percentile(timings, 99):>10.1f}"
+        )
+    print(
+        f"{'total':<22}{len(everything):>8}{'':>8}{len(everything) / elapsed:>9.1f}"
+        f"{percentile(everything, 50):>10.1f}{percentile(everything, 95):>10.1f}"
+        f"{percentile(everything, 99):>10.1f}"
+    )
+    if unexpected:
+        print("\nunexpected statuses:")
+        for name, statuses in unexpected.items():
+            counts = ", ".join(f"{status}×{n}" for status, n in statuses.most_common())
+            print(f"  {name:<20}{counts}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="секунд")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--orgs", type=int, default=1_000)
+    parser.add_argument("--responsible", type=int, default=3)
+    parser.add_argument("--tenders", type=int, default=100_000)
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    results = defaultdict(list)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=30
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                worker(
+                    client,
+                    Dataset(args, random.Random(args.seed + i)),
+                    deadline,
+                    results,
+                )
+                for i in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
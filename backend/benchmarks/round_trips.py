@@ -0,0 +1,137 @@
+"""Число обращений к базе на каждый эндпоинт.
+
+Запускается из каталога backend против базы с применёнными миграциями:
+
+    POSTGRES_CONN=postgresql://... python -m benchmarks.round_trips
+
+Создаёт собственные тестовые сущности, вызывает каждый маршрут дважды
+(холодный и тёплый кэш) и печатает число выполненных SQL-запросов.
+"""
+import asyncio
+import uuid
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+
+import database
+import models
+from routes import router
+
+statements = 0
+
+
+def _count(*args):
+    global statements
+    statements += 1
+
+
+async def seed(suffix: str):
+    db = database.new_session()
+    org = models.Organization(id=uuid.uuid4(), name=f"rt_org_{suffix}")
+    owner = models.Employee(id=uuid.uuid4(), username=f"rt_owner_{suffix}")
+    author = models.Employee(id=uuid.uuid4(), username=f"rt_author_{suffix}")
+    db.add_all([org, owner, author])
+    await db.flush()
+    db.add(models.OrganizationResponsibility(user_id=owner.id, organization_id=org.id))
+    await db.commit()
+    await db.close()
+    return org, owner.username, author.username
+
+
+async def main():
+    database.init_engines()
+    engine = database.async_engine or database.engine
+    event.listen(
+        getattr(engine, "sync_engine", engine), "before_cursor_execute", _count
+    )
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    org, owner, author = await seed(uuid.uuid4().hex[:8])
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        tender = (
+            await c.post(
+                "/api/tenders/new",
+                json={
+                    "name": "rt",
+                    "description": "rt",
+                    "serviceType": "Construction",
+                    "organizationId": str(org.id),
+                    "creatorUsername": owner,
+                },
+            )
+        ).json()["id"]
+        bid = (
+            await c.post(
+                "/api/bids/new",
+                json={
+                    "name": "rt",
+                    "description": "rt",
+                    "tenderId": tender,
+                    "organizationId": str(org.id),
+                    "creatorUsername": author,
+                },
+            )
+        ).json()["id"]
+
+        calls = [
+            ("GET", "/api/tenders", {}),
+            ("GET", "/api/tenders/my", {"username": owner}),
+            ("GET", f"/api/tenders/{tender}/status", {}),
+            (
+                "PUT",
+                f"/api/tenders/{tender}/status",
+                {"status": "Published", "username": owner},
+            ),
+            (
+                "PATCH",
+                f"/api/tenders/{tender}/edit",
+                {"username": owner, "name": "rt2"},
+            ),
+            ("PUT", f"/api/tenders/{tender}/rollback/1", {"username": owner}),
+            ("GET", "/api/bids/my", {"username": author}),
+            ("GET", f"/api/bids/{tender}/list", {"username": owner}),
+            ("GET", f"/api/bids/{bid}/status", {"username": author}),
+            (
+                "PUT",
+                f"/api/bids/{bid}/status",
+                {"status": "Published", "username": author},
+            ),
+            ("PUT", f"/api/bids/{bid}/feedback", {"username": owner}),
+            (
+                "GET",
+                f"/api/bids/{tender}/reviews",
+                {"authorUsername": author, "requesterUsername": owner},
+            ),
+            (
+                "PUT",
+                f"/api/bids/{bid}/submit_decision",
+                {"decision": "Approved", "username": owner},
+            ),
+        ]
+
+        global statements
+        print(f"{'endpoint':<60}{'cold':>6}{'warm':>6}")
+        for method, path, params in calls:
+            counts = []
+            for _ in range(2):
+                statements = 0
+                kwargs = {"params": params}
+                if path.endswith("/feedback"):
+                    kwargs["json"] = {"feedback": "rt"}
+                await c.request(method, path, **kwargs)
+                counts.append(statements)
+            label = (
+                f"{method} {path.replace(tender, '{tenderId}').replace(bid, '{bidId}')}"
+            )
+            print(f"{label:<60}{counts[0]:>6}{counts[1]:>6}")
+
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
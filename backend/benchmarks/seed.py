@@ -0,0 +1,174 @@
+"""Воспроизводимый набор данных для нагрузочного тестирования.
+
+Запускается из каталога backend против базы с применёнными миграциями:
+
+    POSTGRES_CONN=postgresql://... python -m benchmarks.seed \
+        --tenders 1000000 --bids 10000000
+
+Все идентификаторы и связи выводятся из номера строки (md5 от префикса
+и номера), поэтому benchmarks.load с теми же параметрами масштаба знает
+владельцев, авторов и ответственных без обращений к базе. Данные
+вставляются пачками по --batch строк, каждая пачка — своя транзакция.
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+import database
+
+# (таблица, количество, SQL); :lo и :hi — границы текущей пачки
+STEPS = [
+    (
+        "employee",
+        "users",
+        """
+        INSERT INTO employee (id, username, first_name, last_name)
+        SELECT md5('employee:' || g)::uuid, 'load_user_' || g, 'User', g::text
+        FROM generate_series(:lo, :hi) g
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "organization",
+        "orgs",
+        """
+        INSERT INTO organization (id, name, type)
+        SELECT md5('organization:' || g)::uuid, 'load_org_' || g,
+               (ARRAY['IE', 'LLC', 'JSC']::organization_type[])[1 + g % 3]
+        FROM generate_series(:lo, :hi) g
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "organization_responsibility",
+        "orgs",
+        """
+        INSERT INTO organization_responsibility (user_id, organization_id)
+        SELECT md5('employee:' || (1 + ((g - 1) * :responsible + r - 1) % :users))::uuid,
+               md5('organization:' || g)::uuid
+        FROM generate_series(:lo, :hi) g, generate_series(1, :responsible) r
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "tender",
+        "tenders",
+        """
+        INSERT INTO tender (id, name, description, "organizationId", creator_id,
+                            "serviceType", status, version, created_at)
+        SELECT md5('tender:' || g)::uuid, 'Tender ' || left(md5(g::text), 12),
+               'load', md5('organization:' || (1 + (g - 1) % :orgs))::uuid,
+               md5('employee:' || (1 + ((g - 1) % :orgs) * :responsible % :users))::uuid,
+               (ARRAY['Construction', 'Delivery', 'Manufacture'])[1 + g % 3],
+               'Published', 1, now() - g * interval '1 second'
+        FROM generate_series(:lo, :hi) g
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "tender_version",
+        "tenders",
+        """
+        INSERT INTO tender_version (tender_id, version, name, description,
+                                    "serviceType")
+        SELECT t.id, 1, t.name, t.description, t."serviceType"
+        FROM generate_series(:lo, :hi) g
+        JOIN tender t ON t.id = md5('tender:' || g)::uuid
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "bid",
+        "bids",
+        """
+        INSERT INTO bid (id, name, description, tender_id, organization_id,
+                         author_id, status, version, created_at)
+        SELECT md5('bid:' || g)::uuid, 'Bid ' || g, 'load',
+               md5('tender:' || (1 + (g - 1) % :tenders))::uuid,
+               md5('organization:' || (1 + (g - 1) % :tenders % :orgs))::uuid,
+               md5('employee:' || (1 + g * 7919 % :users))::uuid,
+               'Published', 1, now() - g * interval '1 second'
+        FROM generate_series(:lo, :hi) g
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "bid_version",
+        "bids",
+        """
+        INSERT INTO bid_version (bid_id, version, name, description)
+        SELECT b.id, 1, b.name, b.description
+        FROM generate_series(:lo, :hi) g
+        JOIN bid b ON b.id = md5('bid:' || g)::uuid
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "tender_bid_stats",
+        "tenders",
+        """
+        INSERT INTO tender_bid_stats (tender_id, total, published)
+        SELECT b.tender_id, count(*), count(*)
+        FROM bid b
+        WHERE b.tender_id IN (
+            SELECT md5('tender:' || g)::uuid FROM generate_series(:lo, :hi) g
+        )
+        GROUP BY b.tender_id
+        ON CONFLICT (tender_id) DO UPDATE
+        SET total = excluded.total, published = excluded.published
+        """,
+    ),
+    (
+        "bid_feedback",
+        "bids",
+        """
+        INSERT INTO bid_feedback (id, bid_id, username, feedback)
+        SELECT md5('feedback:' || g)::uuid, md5('bid:' || g)::uuid,
+               'load_user_' || (1 + (g - 1) % :tenders % :orgs * :responsible % :users),
+               'Feedback ' || g
+        FROM generate_series(:lo, :hi) g
+        WHERE g % :feedback_every = 0
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--orgs", type=int, default=1_000)
+    parser.add_argument("--responsible", type=int, default=3)
+    parser.add_argument("--tenders", type=int, default=100_000)
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    parser.add_argument(
+        "--feedback-every", type=int, default=5, help="отзыв на каждое N-е предложение"
+    )
+    parser.add_argument("--batch", type=int, default=100_000)
+    args = parser.parse_args()
+
+    params = dict(
+        users=args.users,
+        orgs=args.orgs,
+        responsible=args.responsible,
+        tenders=args.tenders,
+        bids=args.bids,
+        feedback_every=args.feedback_every,
+    )
+    database.init_engines(sync=True)
+    with database.engine.connect() as conn:
+        for table, scale, sql in STEPS:
+            started = time.perf_counter()
+            total = params[scale]
+            for lo in range(1, total + 1, args.batch):
+                hi = min(lo + args.batch - 1, total)
+                conn.execute(text(sql), dict(params, lo=lo, hi=hi))
+                conn.commit()
+            print(f"{table:<30}{total:>12}{time.perf_counter() - started:>10.1f}s")
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Стоимость сериализации строки списка предложений.
+
+Сравнивает прежний путь (schemas.Bid на строку + валидация
+response_model в FastAPI) с выдачей словарей строк через orjson:
+
+    python -m benchmarks.serialization
+"""
+import timeit
+import uuid
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+import schemas
+
+response_adapter = TypeAdapter(List[schemas.Bid])
+
+
+def make_rows(n: int) -> List[dict]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "name": f"Bid {i}",
+            "description": "description",
+            "tenderId": uuid.uuid4(),
+            "status": "Published",
+            "version": 1,
+            "createdAt": datetime.now(),
+            "authorId": uuid.uuid4(),
+            "authorType": "User",
+        }
+        for i in range(n)
+    ]
+
+
+def model_path(rows: List[dict]) -> bytes:
+    # Как раньше: модель на строку, затем FastAPI валидирует и
+    # сериализует ответ по response_model
+    bids = [schemas.Bid(**row) for row in rows]
+    validated = response_adapter.validate_python(bids, from_attributes=True)
+    content = response_adapter.dump_python(validated, mode="json", by_alias=True)
+    return JSONResponse(content).body
+
+
+def row_path(rows: List[dict]) -> bytes:
+    return ORJSONResponse(rows).body
+
+
+def main():
+    print(f"{'rows':>6}{'models, us/row':>18}{'orjson, us/row':>18}")
+    for n in (50, 5000):
+        rows = make_rows(n)
+        assert len(row_path(rows)) > 0 and len(model_path(rows)) > 0
+        number = max(1, 50_000 // n)
+        results = []
+        for path in (model_path, row_path):
+            best = min(timeit.repeat(lambda: path(rows), number=number, repeat=5))
+            results.append(best / number / n * 1e6)
+        print(f"{n:>6}{results[0]:>18.2f}{results[1]:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Счётчики предложений по тендерам.
+
+tender_bid_stats обновляется инкрементно в той же транзакции, что и
+предложение: события маппера покрывают create_bid, смену статуса,
+решения, пакетная вставка вызывает record_inserted. Счётчики одного
+тендера обновляются через UPSERT, поэтому запись идёт последовательно
+по строке тендера.
+
+Расхождения (правки в обход приложения, старые данные) исправляет
+reconcile — периодически и по запросу POST /api/internal/bid-stats/reconcile.
+Сверку одновременно выполняет только один процесс (advisory lock).
+"""
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import database
+import models
+
+RECONCILE_INTERVAL = float(os.getenv("BID_STATS_RECONCILE_INTERVAL", "3600"))
+RECONCILE_CHUNK = int(os.getenv("BID_STATS_RECONCILE_CHUNK", "1000"))
+# Ключ advisory lock, под которым выполняется сверка
+RECONCILE_LOCK = 7_351_023
+
+logger = logging.getLogger(__name__)
+
+STATUS_COLUMNS = {
+    "Created": "created",
+    "Published": "published",
+    "Canceled": "canceled",
+    "Approved": "approved",
+    "Rejected": "rejected",
+}
+COUNTERS = ["total", *STATUS_COLUMNS.values()]
+EMPTY = dict.fromkeys(COUNTERS, 0)
+
+table = models.TenderBidStats.__table__
+
+
+def status_column(status: Optional[str]) -> Optional[str]:
+    # Статус по умолчанию в модели — CREATED, в API — Created
+    return STATUS_COLUMNS.get((status or "").capitalize())
+
+
+def upsert(deltas: Dict[UUID, Counter], absolute: bool = False):
+    """UPSERT счётчиков: прибавляет deltas или (absolute) записывает их."""
+    statement = insert(table).values(
+        [
+            {"tender_id": tender_id, **{c: counts[c] for c in COUNTERS}}
+            for tender_id, counts in sorted(deltas.items())
+        ]
+    )
+    if absolute:
+        values = {c: statement.excluded[c] for c in COUNTERS}
+    else:
+        values = {c: table.c[c] + statement.excluded[c] for c in COUNTERS}
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.tender_id],
+        set_={**values, "updated_at": func.now()},
+    )
+
+
+@event.listens_for(models.Bid, "after_insert")
+def bid_inserted(mapper, connection, target):
+    deltas = Counter(total=1)
+    column = status_column(target.status)
+    if column:
+        deltas[column] += 1
+    connection.execute(upsert({target.tender_id: deltas}))
+
+
+@event.listens_for(models.Bid, "after_update")
+def bid_updated(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.deleted:
+        return
+    old, new = status_column(history.deleted[0]), status_column(target.status)
+    if old == new:
+        return
+    deltas = Counter()
+    if old:
+        deltas[old] -= 1
+    if new:
+        deltas[new] += 1
+    connection.execute(upsert({target.tender_id: deltas}))
+
+
+async def record_inserted(db: AsyncSession, rows: Iterable[dict]):
+    """Счётчики для строк, вставленных в обход ORM (пакетное создание)."""
+    deltas = defaultdict(Counter)
+    for row in rows:
+        counts = deltas[row["tender_id"]]
+        counts["total"] += 1
+        column = status_column(row.get("status"))
+        if column:
+            counts[column] += 1
+    if deltas:
+        await db.execute(upsert(deltas))
+
+
+async def get_stats(db: AsyncSession, tender_ids: Iterable[UUID]) -> Dict[UUID, dict]:
+    ids = list(tender_ids)
+    if not ids:
+        return {}
+    rows = await db.execute(
+        select(table.c.tender_id, *(table.c[c] for c in COUNTERS)).where(
+            table.c.tender_id.in_(ids)
+        )
+    )
+    return {row.tender_id: {c: row._mapping[c] for c in COUNTERS} for row in rows}
+
+
+async def with_stats(db: AsyncSession, rows: List[dict]) -> List[dict]:
+    """Копии строк списка тендеров с полем bidStats.
+
+    Строки могут прийти из кэша (в Redis id — строка), поэтому они
+    не изменяются на месте.
+    """
+    ids = [UUID(str(row["id"])) for row in rows]
+    stats = await get_stats(db, set(ids))
+    return [
+        {**row, "bidStats": stats.get(tender_id, EMPTY)}
+        for row, tender_id in zip(rows, ids)
+    ]
+
+
+async def reconcile_chunk(db: AsyncSession, ids: List[UUID]) -> int:
+    # Недостающие строки создаются нулевыми, затем все строки порции
+    # блокируются до подсчёта. Параллельный инкремент, в том числе первый
+    # для тендера, дождётся коммита сверки и ляжет поверх, а не будет
+    # перезаписан
+    await db.execute(
+        insert(table)
+        .values([{"tender_id": tender_id, **EMPTY} for tender_id in sorted(ids)])
+        .on_conflict_do_nothing(index_elements=[table.c.tender_id])
+    )
+    stored = {
+        row.tender_id: row._mapping
+        for row in await db.execute(
+            select(table)
+            .where(table.c.tender_id.in_(ids))
+            .order_by(table.c.tender_id)
+            .with_for_update()
+        )
+    }
+    actual = defaultdict(Counter)
+    counts = await db.execute(
+        select(models.Bid.tender_id, models.Bid.status, func.count())
+        .where(models.Bid.tender_id.in_(ids))
+        .group_by(models.Bid.tender_id, models.Bid.status)
+    )
+    for tender_id, status, count in counts:
+        actual[tender_id]["total"] += count
+        column = status_column(status)
+        if column:
+            actual[tender_id][column] += count
+
+    fixes = {}
+    for tender_id in ids:
+        expected = actual[tender_id]
+        if all(stored[tender_id][c] == expected[c] for c in COUNTERS):
+            continue
+        fixes[tender_id] = expected
+    if fixes:
+        await db.execute(upsert(fixes, absolute=True))
+    return len(fixes)
+
+
+async def reconcile(chunk: int = RECONCILE_CHUNK) -> int:
+    """Сверяет счётчики с таблицей bid; возвращает число исправленных тендеров.
+
+    Тендеры обходятся порциями по id, каждая порция — своя транзакция.
+    """
+    repaired = 0
+    after = None
+    while True:
+        db = database.new_session()
+        try:
+            query = select(models.Tender.id).order_by(models.Tender.id).limit(chunk)
+            if after is not None:
+                query = query.where(models.Tender.id > after)
+            ids = (await db.scalars(query)).all()
+            if not ids:
+                return repaired
+            after = ids[-1]
+            repaired += await reconcile_chunk(db, ids)
+            await db.commit()
+        finally:
+            await db.close()
+
+
+async def reconcile_exclusive(chunk: int = RECONCILE_CHUNK) -> Optional[int]:
+    """reconcile, если его сейчас не выполняет другой процесс; иначе None.
+
+    Транзакционный lock держит отдельная сессия, он снимается при её
+    закрытии, в том числе после ошибки.
+    """
+    guard = database.new_session()
+    try:
+        if not await guard.scalar(
+            select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK))
+        ):
+            return None
+        return await reconcile(chunk)
+    finally:
+        await guard.close()
+
+
+async def run_reconciler():
+    # Задача есть в каждом воркере, сверку выполняет тот, кто взял lock
+    while True:
+        await asyncio.sleep(RECONCILE_INTERVAL)
+        try:
+            repaired = await reconcile_exclusive()
+        except Exception:
+            logger.exception("Bid stats reconciliation failed")
+            continue
+        if repaired:
+            logger.warning("Bid stats reconciliation repaired %d tenders", repaired)
+
+
+def start() -> Optional[asyncio.Task]:
+    if RECONCILE_INTERVAL <= 0:
+        return None
+    return asyncio.create_task(run_reconciler())
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU-кэш с ограничением по размеру и времени жизни записей."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires_at = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / total if total else 0.0,
+        }
+
+
+class LocalResponseCache:
+    """Асинхронный интерфейс кэша ответов поверх TTLCache в памяти процесса."""
+
+    backend = "local"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.store = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key, default=None):
+        return self.store.get(key, default)
+
+    async def set(self, key, value):
+        self.store.set(key, value)
+
+    async def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        return {"backend": self.backend, **self.store.stats()}
+
+
+class RedisResponseCache:
+    """Кэш ответов в Redis, общий для всех процессов приложения.
+
+    Ключи пространства имён собираются в отдельное множество, чтобы
+    сброс не требовал SCAN по всей базе. Ошибки Redis считаются промахом.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, namespace: str, ttl: float):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.errors = (redis.RedisError, OSError)
+        self.namespace = namespace
+        self.index = f"{namespace}:keys"
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key) -> str:
+        return f"{self.namespace}:{orjson.dumps(key).decode()}"
+
+    async def get(self, key, default=None):
+        try:
+            raw = await self.client.get(self._key(key))
+        except self.errors:
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return orjson.loads(raw)
+
+    async def set(self, key, value):
+        key = self._key(key)
+        ttl = max(int(self.ttl), 1)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                # id из asyncpg — подкласс UUID, orjson его сам не сериализует
+                pipe.set(key, orjson.dumps(value, default=str), ex=ttl)
+                pipe.sadd(self.index, key)
+                pipe.expire(self.index, ttl)
+                await pipe.execute()
+        except self.errors:
+            pass
+
+    async def clear(self):
+        try:
+            keys = await self.client.smembers(self.index)
+            await self.client.delete(self.index, *keys)
+        except self.errors:
+            pass
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / total if total else 0.0,
+        }
+
+
+def response_cache(namespace: str, maxsize: int, ttl: float, redis_url=None):
+    if redis_url:
+        return RedisResponseCache(redis_url, namespace, ttl)
+    return LocalResponseCache(maxsize, ttl)
@@ -1,18 +1,385 @@
+from datetime import datetime
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    ARRAY,
+    DateTime,
+    any_,
+    bindparam,
+    case,
+    event,
+    exists,
+    func,
+    inspect,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import base64
+import json
+import os
+import uuid
+import bid_stats
+import database
+import events
 import models
+import outbox
 import schemas
-from typing import List, Optional
+from cache import TTLCache, response_cache
+from typing import (
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 
-def create_tender(db: Session, tender: schemas.TenderCreate, creator_username: str):
-    user = (
-        db.query(models.Employee)
-        .filter(models.Employee.username == creator_username)
-        .first()
+class CachedEmployee(NamedTuple):
+    id: UUID
+    username: str
+
+
+employee_cache = TTLCache(
+    maxsize=int(os.getenv("EMPLOYEE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("EMPLOYEE_CACHE_TTL", "300")),
+)
+
+
+async def get_employee(db: AsyncSession, username: str) -> Optional[CachedEmployee]:
+    # Сначала кэш запроса (session.info), затем общий кэш процесса
+    request_cache = db.info.setdefault("employees", {})
+    employee = request_cache.get(username)
+    if employee is not None:
+        return employee
+
+    employee = employee_cache.get(username)
+    if employee is None:
+        user = await db.scalar(
+            select(models.Employee).where(models.Employee.username == username)
+        )
+        if not user:
+            return None
+        employee = CachedEmployee(id=user.id, username=user.username)
+        employee_cache.set(username, employee)
+
+    request_cache[username] = employee
+    return employee
+
+
+async def resolve_employees(
+    db: AsyncSession, usernames: Iterable[str]
+) -> Dict[str, CachedEmployee]:
+    """Пакетный вариант get_employee: промахи кэша одним запросом."""
+    found = {}
+    missing = []
+    for username in set(usernames):
+        employee = employee_cache.get(username)
+        if employee is None:
+            missing.append(username)
+        else:
+            found[username] = employee
+
+    if missing:
+        rows = await db.execute(
+            select(models.Employee.id, models.Employee.username).where(
+                models.Employee.username.in_(missing)
+            )
+        )
+        for user_id, username in rows:
+            employee = CachedEmployee(id=user_id, username=username)
+            employee_cache.set(username, employee)
+            found[username] = employee
+
+    return found
+
+
+def invalidate_employee(username: str):
+    employee_cache.invalidate(username)
+
+
+@event.listens_for(models.Employee, "after_update")
+@event.listens_for(models.Employee, "after_delete")
+def _invalidate_employee(mapper, connection, target):
+    invalidate_employee(target.username)
+    for old_username in inspect(target).attrs.username.history.deleted:
+        invalidate_employee(old_username)
+
+
+responsibility_cache = TTLCache(
+    maxsize=int(os.getenv("RESPONSIBILITY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("RESPONSIBILITY_CACHE_TTL", "60")),
+)
+
+
+async def get_responsible_organizations(db: AsyncSession, user_id: UUID) -> frozenset:
+    organizations = responsibility_cache.get(user_id)
+    if organizations is None:
+        rows = await db.scalars(
+            select(models.OrganizationResponsibility.organization_id).where(
+                models.OrganizationResponsibility.user_id == user_id
+            )
+        )
+        organizations = frozenset(rows.all())
+        responsibility_cache.set(user_id, organizations)
+    return organizations
+
+
+async def is_responsible(db: AsyncSession, user_id: UUID, organization_id) -> bool:
+    if organization_id is None:
+        return False
+    if not isinstance(organization_id, UUID):
+        organization_id = UUID(str(organization_id))
+    return organization_id in await get_responsible_organizations(db, user_id)
+
+
+def invalidate_responsibilities(user_id: UUID):
+    responsibility_cache.invalidate(user_id)
+
+
+@event.listens_for(models.OrganizationResponsibility, "after_insert")
+@event.listens_for(models.OrganizationResponsibility, "after_update")
+@event.listens_for(models.OrganizationResponsibility, "after_delete")
+def _invalidate_responsibilities(mapper, connection, target):
+    invalidate_responsibilities(target.user_id)
+    for old_user_id in inspect(target).attrs.user_id.history.deleted:
+        invalidate_responsibilities(old_user_id)
+
+
+class TenderAccess(NamedTuple):
+    tender: models.Tender
+    is_owner: bool
+    is_responsible: bool
+
+
+async def get_tender_access(
+    db: AsyncSession, tender_id, user_id: UUID
+) -> Optional[TenderAccess]:
+    """Тендер вместе с правами пользователя на него одним запросом."""
+    responsible = (
+        exists()
+        .where(
+            models.OrganizationResponsibility.user_id == user_id,
+            models.OrganizationResponsibility.organization_id
+            == models.Tender.organizationId,
+        )
+        .label("is_responsible")
+    )
+    row = (
+        await db.execute(
+            select(
+                models.Tender,
+                (models.Tender.creator_id == user_id).label("is_owner"),
+                responsible,
+            ).where(models.Tender.id == tender_id)
+        )
+    ).first()
+    if not row:
+        return None
+    return TenderAccess(row[0], bool(row[1]), bool(row[2]))
+
+
+async def get_author_reviews(
+    db: AsyncSession,
+    tender_id,
+    author_id: UUID,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    query = (
+        select(*FEEDBACK_COLUMNS)
+        .join(models.Bid, models.Bid.id == models.BidFeedback.bid_id)
+        .where(models.Bid.tender_id == tender_id, models.Bid.author_id == author_id)
+    )
+    query = paginate(
+        query,
+        models.BidFeedback.created_at,
+        models.BidFeedback.id,
+        limit,
+        offset,
+        cursor,
+    )
+    reviews = await fetch_dicts(db, query)
+
+    if not reviews:
+        has_bids = await db.scalar(
+            select(
+                exists().where(
+                    models.Bid.tender_id == tender_id, models.Bid.author_id == author_id
+                )
+            )
+        )
+        if not has_bids:
+            raise HTTPException(
+                status_code=404,
+                detail="No bids found for the specified author and tender",
+            )
+
+    return reviews, next_cursor(reviews, "createdAt", limit)
+
+
+def encode_cursor(sort_key, row_id) -> str:
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    raw = json.dumps([sort_key, str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, datetime_key: bool = False):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_key, row_id = json.loads(raw)
+        if datetime_key:
+            sort_key = datetime.fromisoformat(sort_key)
+        return sort_key, UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, sort_column, id_column, limit, offset, cursor=None):
+    """Сортировка по (sort_column, id) и выборка страницы.
+
+    С курсором используется keyset-условие вместо OFFSET.
+    """
+    if cursor:
+        if offset:
+            raise HTTPException(
+                status_code=400, detail="cursor and offset cannot be combined"
+            )
+        datetime_key = isinstance(sort_column.type, DateTime)
+        sort_key, row_id = decode_cursor(cursor, datetime_key=datetime_key)
+        query = query.where(tuple_(sort_column, id_column) > (sort_key, row_id))
+    else:
+        query = query.offset(offset)
+    return query.order_by(sort_column, id_column).limit(limit)
+
+
+def next_cursor(rows: List[dict], sort_key: str, limit: int) -> Optional[str]:
+    if not limit or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last[sort_key], last["id"])
+
+
+# Списки читаются кортежами нужных колонок, без загрузки ORM-объектов;
+# подписи колонок совпадают с ключами ответа
+TENDER_COLUMNS = (
+    models.Tender.id,
+    models.Tender.name,
+    models.Tender.description,
+    models.Tender.status,
+    models.Tender.serviceType,
+    models.Tender.organizationId,
+    models.Tender.version,
+    models.Tender.created_at,
+)
+
+BID_COLUMNS = (
+    models.Bid.id,
+    models.Bid.name,
+    models.Bid.description,
+    models.Bid.tender_id.label("tenderId"),
+    models.Bid.status,
+    models.Bid.version,
+    models.Bid.created_at.label("createdAt"),
+    models.Bid.author_id.label("authorId"),
+)
+
+FEEDBACK_COLUMNS = (
+    models.BidFeedback.id,
+    models.BidFeedback.bid_id.label("bidId"),
+    models.BidFeedback.username,
+    models.BidFeedback.feedback,
+    models.BidFeedback.created_at.label("createdAt"),
+)
+
+BID_AUTHOR_TYPE = case(
+    (models.Bid.organization_id.is_not(None), "Organization"), else_="User"
+).label("authorType")
+
+
+async def fetch_dicts(db: AsyncSession, query) -> List[dict]:
+    return [dict(row) for row in (await db.execute(query)).mappings()]
+
+
+def bid_to_dict(bid: models.Bid, author_type: str = "User") -> dict:
+    return {
+        "id": bid.id,
+        "name": bid.name,
+        "description": bid.description,
+        "tenderId": bid.tender_id,
+        "status": bid.status,
+        "version": bid.version,
+        "createdAt": bid.created_at,
+        "authorId": bid.author_id,
+        "authorType": author_type,
+    }
+
+
+def tender_version(tender: models.Tender) -> models.TenderVersion:
+    return models.TenderVersion(
+        tender_id=tender.id,
+        version=tender.version,
+        name=tender.name,
+        description=tender.description,
+        serviceType=tender.serviceType,
+    )
+
+
+def bid_version(bid: models.Bid) -> models.BidVersion:
+    return models.BidVersion(
+        bid_id=bid.id,
+        version=bid.version,
+        name=bid.name,
+        description=bid.description,
+    )
+
+
+async def claim_version(db: AsyncSession, model, entity) -> bool:
+    """Увеличивает версию, только если запись не менялась с момента чтения.
+
+    Условный UPDATE вместо SELECT ... FOR UPDATE: параллельная правка
+    просто не найдёт строку с прежней версией.
+    """
+    result = await db.execute(
+        update(model)
+        .where(
+            model.id == entity.id,
+            model.version == entity.version,
+            model.updated_at.is_not_distinct_from(entity.updated_at),
+        )
+        .values(version=model.version + 1)
+        .execution_options(synchronize_session=False)
     )
+    return result.rowcount == 1
+
+
+async def next_version(db: AsyncSession, model, entity):
+    """Занимает следующую версию для правки или отката.
+
+    Без условного UPDATE две параллельные правки вставили бы строку истории
+    с одним номером и упали бы на первичном ключе таблицы версий.
+    """
+    if not await claim_version(db, model, entity):
+        raise HTTPException(
+            status_code=409, detail="Resource was modified concurrently, retry"
+        )
+    entity.version += 1
+
+
+async def create_tender(
+    db: AsyncSession, tender: schemas.TenderCreate, creator_username: str
+):
+    user = await get_employee(db, creator_username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -23,53 +390,256 @@ def create_tender(db: Session, tender: schemas.TenderCreate, creator_username: s
         creator_id=user.id,
         serviceType=tender.serviceType,
         status=tender.status,
+        version=1,
     )
     db.add(db_tender)
-    db.commit()
-    db.refresh(db_tender)
+    await db.flush()
+    db.add(tender_version(db_tender))
+    await db.commit()
+    await invalidate_tender_lists()
+    await db.refresh(db_tender)
     return db_tender
 
 
-def get_tenders(
-    db: Session, limit: int, offset: int, service_type: Optional[List[str]] = None
-):
-    query = db.query(models.Tender)
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
 
-    if service_type:
-        query = query.filter(models.Tender.service_type.in_(service_type))
 
-    query = query.order_by(models.Tender.name).offset(offset).limit(limit)
+async def existing_ids(db: AsyncSession, column, ids: Iterable) -> set:
+    ids = set(ids)
+    if not ids:
+        return set()
+    return set((await db.scalars(select(column).where(column.in_(ids)))).all())
 
-    return query.all()
 
+async def insert_batch(
+    db: AsyncSession,
+    model,
+    rows,
+    version_model,
+    versions,
+    indexes,
+    errors,
+    on_insert=None,
+) -> List[dict]:
+    """Вставляет пачку строк и их версии одной транзакцией.
 
-def get_tenders_by_user(
-    db: Session, username: str, limit: int, offset: int
-) -> List[schemas.TenderSchema]:
-    user = (
-        db.query(models.Employee).filter(models.Employee.username == username).first()
+    Если пачка нарушила ограничение, откатывается только она, а ошибка
+    записывается каждому её элементу. Версии (version_model, versions)
+    необязательны; on_insert(db, rows) выполняется в той же транзакции.
+    """
+    if not rows:
+        return []
+    try:
+        await db.execute(insert(model), rows)
+        if versions:
+            await db.execute(insert(version_model), versions)
+        if on_insert is not None:
+            await on_insert(db, rows)
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        detail = str(exc.orig).splitlines()[0]
+        errors.extend({"index": index, "detail": detail} for index in indexes)
+        return []
+    return [{"index": index, "id": row["id"]} for index, row in zip(indexes, rows)]
+
+
+async def bulk_create_tenders(
+    db: AsyncSession, items: List[Tuple[int, schemas.TenderCreate]]
+) -> Tuple[List[dict], List[dict]]:
+    errors = []
+    employees = await resolve_employees(db, (t.creatorUsername for _, t in items))
+    organizations = await existing_ids(
+        db, models.Organization.id, (t.organizationId for _, t in items)
     )
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    query = db.query(models.Tender).filter(models.Tender.creator_id == user.id)
-    query = query.order_by(models.Tender.name).offset(offset).limit(limit)
+    tenders, versions, indexes = [], [], []
+    for index, tender in items:
+        user = employees.get(tender.creatorUsername)
+        if not user:
+            errors.append({"index": index, "detail": "User not found"})
+            continue
+        if tender.organizationId not in organizations:
+            errors.append({"index": index, "detail": "Organization not found"})
+            continue
+        tender_id = uuid.uuid4()
+        tenders.append(
+            dict(
+                id=tender_id,
+                name=tender.name,
+                description=tender.description,
+                organizationId=tender.organizationId,
+                creator_id=user.id,
+                serviceType=tender.serviceType,
+                status=tender.status,
+                version=1,
+            )
+        )
+        versions.append(
+            dict(
+                tender_id=tender_id,
+                version=1,
+                name=tender.name,
+                description=tender.description,
+                serviceType=tender.serviceType,
+            )
+        )
+        indexes.append(index)
 
-    tenders = query.all()
+    created = await insert_batch(
+        db,
+        models.Tender,
+        tenders,
+        models.TenderVersion,
+        versions,
+        indexes,
+        errors,
+        on_insert=events.tenders_inserted,
+    )
+    if created:
+        await invalidate_tender_lists()
+    return created, errors
 
-    results = []
-    for tender in tenders:
-        results.append({**tender.__dict__, "creatorUsername": username})
 
-    return results
+async def bids_inserted(db: AsyncSession, rows: List[dict]):
+    await bid_stats.record_inserted(db, rows)
+    await events.bids_inserted(db, rows)
 
 
-def create_bid(db: Session, bid_data: schemas.BidCreate):
-    user = (
-        db.query(models.Employee)
-        .filter(models.Employee.username == bid_data.creator_username)
-        .first()
+async def bulk_create_bids(
+    db: AsyncSession, items: List[Tuple[int, schemas.BidCreate]]
+) -> Tuple[List[dict], List[dict]]:
+    errors = []
+    employees = await resolve_employees(db, (b.creator_username for _, b in items))
+    tenders = await existing_ids(db, models.Tender.id, (b.tender_id for _, b in items))
+    organizations = await existing_ids(
+        db, models.Organization.id, (b.organization_id for _, b in items)
     )
+
+    bids, versions, indexes = [], [], []
+    for index, bid in items:
+        user = employees.get(bid.creator_username)
+        if not user:
+            errors.append({"index": index, "detail": "User not found"})
+            continue
+        if bid.tender_id not in tenders:
+            errors.append({"index": index, "detail": "Tender not found"})
+            continue
+        if bid.organization_id not in organizations:
+            errors.append({"index": index, "detail": "Organization not found"})
+            continue
+        bid_id = uuid.uuid4()
+        bids.append(
+            dict(
+                id=bid_id,
+                name=bid.name,
+                description=bid.description,
+                tender_id=bid.tender_id,
+                organization_id=bid.organization_id,
+                status=bid.status,
+                version=1,
+                author_id=user.id,
+            )
+        )
+        versions.append(
+            dict(
+                bid_id=bid_id,
+                version=1,
+                name=bid.name,
+                description=bid.description,
+            )
+        )
+        indexes.append(index)
+
+    created = await insert_batch(
+        db,
+        models.Bid,
+        bids,
+        models.BidVersion,
+        versions,
+        indexes,
+        errors,
+        on_insert=bids_inserted,
+    )
+    return created, errors
+
+
+# Публичный список тендеров: страницы кэшируются целиком и сбрасываются
+# после любого изменения тендеров
+tender_list_cache = response_cache(
+    "tender-list",
+    maxsize=int(os.getenv("TENDER_LIST_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TENDER_LIST_CACHE_TTL", "30")),
+    redis_url=os.getenv("TENDER_LIST_CACHE_REDIS_URL"),
+)
+
+
+async def invalidate_tender_lists():
+    await tender_list_cache.clear()
+
+
+async def get_tenders(
+    db: AsyncSession,
+    limit: int,
+    offset: int,
+    service_type: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    key = (limit, offset, tuple(sorted(service_type or ())), cursor)
+    # Недавно писавший клиент должен увидеть свою запись, а страница в
+    # кэше могла быть собрана до неё
+    if not db.info.get("recent_writer"):
+        cached = await tender_list_cache.get(key)
+        if cached is not None:
+            tenders, next_page = cached
+            return tenders, next_page
+
+    tenders, next_page = await query_tenders(db, limit, offset, service_type, cursor)
+    # Отстающая реплика вернула бы в кэш страницу без записи, после
+    # которой кэш только что сбросили
+    if not db.info.get("replica"):
+        await tender_list_cache.set(key, (tenders, next_page))
+    return tenders, next_page
+
+
+async def query_tenders(
+    db: AsyncSession,
+    limit: int,
+    offset: int,
+    service_type: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    query = select(*TENDER_COLUMNS)
+
+    if service_type:
+        query = query.where(models.Tender.serviceType.in_(service_type))
+
+    query = paginate(query, models.Tender.name, models.Tender.id, limit, offset, cursor)
+
+    tenders = await fetch_dicts(db, query)
+    return tenders, next_cursor(tenders, "name", limit)
+
+
+async def get_tenders_by_user(
+    db: AsyncSession,
+    username: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    user = await get_employee(db, username)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    query = select(*TENDER_COLUMNS).where(models.Tender.creator_id == user.id)
+    query = paginate(query, models.Tender.name, models.Tender.id, limit, offset, cursor)
+
+    tenders = await fetch_dicts(db, query)
+    return tenders, next_cursor(tenders, "name", limit)
+
+
+async def create_bid(db: AsyncSession, bid_data: schemas.BidCreate):
+    user = await get_employee(db, bid_data.creator_username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -85,8 +655,10 @@ def create_bid(db: Session, bid_data: schemas.BidCreate):
         author_id=user.id,
     )
     db.add(db_bid)
-    db.commit()
-    db.refresh(db_bid)
+    await db.flush()
+    db.add(bid_version(db_bid))
+    await db.commit()
+    await db.refresh(db_bid)
 
     return {
         "id": db_bid.id,
@@ -102,117 +674,534 @@ def create_bid(db: Session, bid_data: schemas.BidCreate):
     }
 
 
-def get_bids_by_user(
-    db: Session, username: str, limit: int, offset: int
-) -> List[schemas.Bid]:
-    user = (
-        db.query(models.Employee).filter(models.Employee.username == username).first()
-    )
+async def get_bids_by_user(
+    db: AsyncSession,
+    username: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    user = await get_employee(db, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    query = db.query(models.Bid).filter(models.Bid.author_id == user.id)
-    query = query.order_by(models.Bid.created_at).offset(offset).limit(limit)
-
-    bids = query.all()
-
-    return [
-        schemas.Bid(
-            id=bid.id,
-            name=bid.name,
-            description=bid.description,
-            tenderId=bid.tender_id,
-            status=bid.status,
-            version=bid.version,
-            createdAt=bid.created_at,
-            authorId=bid.author_id,
-            authorType="User",
-        )
-        for bid in bids
-    ]
-
-
-def get_bids_for_tender(
-    db: Session, tender_id: str, limit: int, offset: int
-) -> List[schemas.Bid]:
-    query = db.query(models.Bid).filter(models.Bid.tender_id == tender_id)
-    query = query.order_by(models.Bid.created_at).offset(offset).limit(limit)
-
-    bids = query.all()
-
-    results = []
-    for bid in bids:
-        author_type = "Organization" if bid.organization_id else "User"
-        results.append(
-            schemas.Bid(
-                id=bid.id,
-                name=bid.name,
-                description=bid.description,
-                tenderId=bid.tender_id,
-                status=bid.status,
-                version=bid.version,
-                createdAt=bid.created_at,
-                authorId=bid.author_id,
-                authorType=author_type,
-            )
+    query = select(*BID_COLUMNS, literal("User").label("authorType")).where(
+        models.Bid.author_id == user.id
+    )
+    query = paginate(query, models.Bid.created_at, models.Bid.id, limit, offset, cursor)
+
+    bids = await fetch_dicts(db, query)
+    return bids, next_cursor(bids, "createdAt", limit)
+
+
+async def get_bids_for_tender(
+    db: AsyncSession,
+    tender_id: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    query = select(*BID_COLUMNS, BID_AUTHOR_TYPE).where(
+        models.Bid.tender_id == tender_id
+    )
+    query = paginate(query, models.Bid.created_at, models.Bid.id, limit, offset, cursor)
+
+    bids = await fetch_dicts(db, query)
+    if not bids and not await db.get(models.Tender, tender_id):
+        raise HTTPException(status_code=404, detail="Tender not found")
+
+    return bids, next_cursor(bids, "createdAt", limit)
+
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+
+def filter_created(query, column, created_from, created_to):
+    if created_from:
+        query = query.where(column >= created_from)
+    if created_to:
+        query = query.where(column < created_to)
+    return query
+
+
+def tender_export_query(
+    service_type: Optional[List[str]] = None,
+    status: Optional[List[str]] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    query = select(*TENDER_COLUMNS)
+    if service_type:
+        query = query.where(models.Tender.serviceType.in_(service_type))
+    if status:
+        query = query.where(models.Tender.status.in_(status))
+    return filter_created(query, models.Tender.created_at, created_from, created_to)
+
+
+async def visible_bids(db: AsyncSession, username: str, *columns):
+    """Предложения, видимые пользователю: свои и по тендерам организаций,
+    за которые он отвечает."""
+    user = await get_employee(db, username)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    organizations = await get_responsible_organizations(db, user.id)
+
+    return (
+        select(*BID_COLUMNS, BID_AUTHOR_TYPE, *columns)
+        .join(models.Tender, models.Tender.id == models.Bid.tender_id)
+        .where(
+            (models.Bid.author_id == user.id)
+            | models.Tender.organizationId.in_(organizations)
         )
+    )
+
+
+async def bid_export_query(
+    db: AsyncSession,
+    username: str,
+    status: Optional[List[str]] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    query = await visible_bids(db, username)
+    if status:
+        query = query.where(models.Bid.status.in_(status))
+    return filter_created(query, models.Bid.created_at, created_from, created_to)
+
+
+MULTI_GET_LIMIT = int(os.getenv("MULTI_GET_LIMIT", "200"))
+
+# Маркеры для id пакетного запроса, которые нельзя отдать
+NOT_FOUND = {"error": "not_found"}
+FORBIDDEN = {"error": "forbidden"}
+
 
-    return results
+def id_in(column, ids: List[UUID]):
+    # column = ANY(:ids) с одним параметром-массивом: текст запроса
+    # и его план не зависят от размера пачки, в отличие от IN (...)
+    return column == any_(bindparam("ids", ids, type_=ARRAY(column.type)))
 
 
-def create_feedback(
-    db: Session, bidId: UUID, username: str, feedback_data: schemas.BidFeedbackCreate
+async def get_tenders_by_ids(
+    db: AsyncSession, ids: List[UUID], full: bool = False
+) -> Dict[str, dict]:
+    """Тендеры (full) или их статусы по списку id одним запросом."""
+    if full:
+        columns = TENDER_COLUMNS
+    else:
+        columns = (models.Tender.id, models.Tender.status, models.Tender.version)
+    rows = await fetch_dicts(db, select(*columns).where(id_in(models.Tender.id, ids)))
+    found = {row["id"]: row for row in rows}
+    return {str(tender_id): found.get(tender_id, NOT_FOUND) for tender_id in ids}
+
+
+async def get_bids_by_ids(
+    db: AsyncSession, username: str, ids: List[UUID], full: bool = False
+) -> Dict[str, dict]:
+    """Предложения (full) или их статусы по списку id одним запросом.
+
+    Права проверяются как в visible_bids: пользователь и его организации
+    загружаются один раз, чужие предложения помечаются FORBIDDEN.
+    """
+    user = await get_employee(db, username)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    organizations = await get_responsible_organizations(db, user.id)
+
+    if full:
+        columns = (*BID_COLUMNS, BID_AUTHOR_TYPE)
+    else:
+        columns = (models.Bid.id, models.Bid.status, models.Bid.version)
+    rows = await fetch_dicts(
+        db,
+        select(
+            *columns,
+            models.Bid.author_id.label("_author"),
+            models.Tender.organizationId.label("_organization"),
+        )
+        .join(models.Tender, models.Tender.id == models.Bid.tender_id)
+        .where(id_in(models.Bid.id, ids)),
+    )
+    found = {}
+    for row in rows:
+        author, organization = row.pop("_author"), row.pop("_organization")
+        visible = author == user.id or organization in organizations
+        found[row["id"]] = row if visible else FORBIDDEN
+    return {str(bid_id): found.get(bid_id, NOT_FOUND) for bid_id in ids}
+
+
+# Конфигурации — константы запроса, а не параметры: тип regconfig
+# известен без приведения на стороне драйвера
+SEARCH_RUSSIAN = literal_column("'russian'::regconfig")
+SEARCH_ENGLISH = literal_column("'english'::regconfig")
+
+
+def search_terms(model, text: str):
+    """Условие и ранг поиска: полнотекстовое совпадение или похожее название.
+
+    Триграммы (name % text) находят опечатки и части слов, которые
+    tsquery не разбирает; оба условия обслуживаются своими GIN-индексами.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_RUSSIAN, text).op("||")(
+        func.websearch_to_tsquery(SEARCH_ENGLISH, text)
+    )
+    condition = model.search_vector.op("@@")(tsquery) | model.name.op("%")(text)
+    rank = func.ts_rank_cd(model.search_vector, tsquery) + func.similarity(
+        model.name, text
+    )
+    return condition, rank
+
+
+def paginate_ranked(query, rank, id_column, limit: int, cursor: Optional[str]):
+    """Сортировка по убыванию ранга с keyset-курсором (rank, id)."""
+    if cursor:
+        score, row_id = decode_cursor(cursor)
+        query = query.where((rank < score) | ((rank == score) & (id_column > row_id)))
+    return query.order_by(rank.desc(), id_column).limit(limit)
+
+
+async def search_tenders(
+    db: AsyncSession,
+    text: str,
+    limit: int,
+    service_type: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    condition, rank = search_terms(models.Tender, text)
+    query = select(*TENDER_COLUMNS, rank.label("rank")).where(condition)
+    if service_type:
+        query = query.where(models.Tender.serviceType.in_(service_type))
+    query = paginate_ranked(query, rank, models.Tender.id, limit, cursor)
+
+    tenders = await fetch_dicts(db, query)
+    return tenders, next_cursor(tenders, "rank", limit)
+
+
+async def search_bids(
+    db: AsyncSession,
+    username: str,
+    text: str,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    condition, rank = search_terms(models.Bid, text)
+    query = (await visible_bids(db, username, rank.label("rank"))).where(condition)
+    query = paginate_ranked(query, rank, models.Bid.id, limit, cursor)
+
+    bids = await fetch_dicts(db, query)
+    return bids, next_cursor(bids, "rank", limit)
+
+
+async def stream_rows(query) -> AsyncIterator[List[dict]]:
+    """Строки запроса пачками через серверный курсор.
+
+    Сессия своя: зависимость get_db закрывается до отправки
+    потокового ответа. Выгрузка читает с реплики, если она есть.
+    """
+    db = await database.open_read_session()
+    try:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        async for partition in result.mappings().partitions(EXPORT_CHUNK_SIZE):
+            yield [dict(row) for row in partition]
+    finally:
+        await db.close()
+
+
+FEEDBACK_TARGET = (models.Bid.id, models.Bid.tender_id, models.Bid.organization_id)
+
+
+def feedback_event(feedback_id: UUID, bid) -> dict:
+    return dict(
+        id=str(feedback_id),
+        bidId=str(bid.id),
+        tenderId=str(bid.tender_id),
+        organizationId=str(bid.organization_id) if bid.organization_id else None,
+    )
+
+
+async def create_feedback(
+    db: AsyncSession,
+    bidId: UUID,
+    username: str,
+    feedback_data: schemas.BidFeedbackCreate,
 ):
-    bid = db.query(models.Bid).filter(models.Bid.id == bidId).first()
+    bid = (
+        await db.execute(select(*FEEDBACK_TARGET).where(models.Bid.id == bidId))
+    ).first()
     if not bid:
         raise HTTPException(status_code=404, detail="Bid not found")
-    user = (
-        db.query(models.Employee).filter(models.Employee.username == username).first()
-    )
+    user = await get_employee(db, username)
 
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
     db_feedback = models.BidFeedback(
+        id=uuid.uuid4(),
         bid_id=feedback_data.bidId,
         username=feedback_data.username,
         feedback=feedback_data.feedback,
     )
     db.add(db_feedback)
-    db.commit()
-    db.refresh(db_feedback)
+    outbox.enqueue(db, "feedback_created", **feedback_event(db_feedback.id, bid))
+    # Ответ собирается из переданных полей: refresh после коммита не нужен
+    await db.commit()
     return db_feedback
 
 
-def rollback_bid(db: Session, bid_id: UUID, version: int, username: str):
-    user = (
-        db.query(models.Employee).filter(models.Employee.username == username).first()
+async def bulk_create_feedback(
+    db: AsyncSession, items: List[Tuple[int, schemas.BidFeedbackCreate]]
+) -> Tuple[List[dict], List[dict]]:
+    errors = []
+    employees = await resolve_employees(db, (f.username for _, f in items))
+    bid_ids = list({f.bidId for _, f in items})
+    bids = {
+        row.id: row
+        for row in await db.execute(
+            select(*FEEDBACK_TARGET).where(id_in(models.Bid.id, bid_ids))
+        )
+    }
+
+    rows, indexes = [], []
+    for index, feedback in items:
+        if feedback.username not in employees:
+            errors.append({"index": index, "detail": "User not found"})
+            continue
+        if feedback.bidId not in bids:
+            errors.append({"index": index, "detail": "Bid not found"})
+            continue
+        rows.append(
+            dict(
+                id=uuid.uuid4(),
+                bid_id=feedback.bidId,
+                username=feedback.username,
+                feedback=feedback.feedback,
+            )
+        )
+        indexes.append(index)
+
+    async def enqueue_events(db: AsyncSession, rows: List[dict]):
+        await outbox.enqueue_many(
+            db,
+            "feedback_created",
+            [feedback_event(row["id"], bids[row["bid_id"]]) for row in rows],
+        )
+
+    created = await insert_batch(
+        db,
+        models.BidFeedback,
+        rows,
+        None,
+        None,
+        indexes,
+        errors,
+        on_insert=enqueue_events,
+    )
+    return created, errors
+
+
+async def get_bid_feedback(
+    db: AsyncSession,
+    bid_id: UUID,
+    username: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Отзывы на предложение по индексу (bid_id, created_at, id)."""
+    user = await get_employee(db, username)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    bid = (
+        await db.execute(
+            select(models.Bid.author_id, models.Tender.organizationId)
+            .join(models.Tender, models.Tender.id == models.Bid.tender_id)
+            .where(models.Bid.id == bid_id)
+        )
+    ).first()
+    if not bid:
+        raise HTTPException(status_code=404, detail="Bid not found")
+    if bid.author_id != user.id and not await is_responsible(
+        db, user.id, bid.organizationId
+    ):
+        raise HTTPException(
+            status_code=403, detail="Insufficient rights to view feedback"
+        )
+
+    query = paginate(
+        select(*FEEDBACK_COLUMNS).where(models.BidFeedback.bid_id == bid_id),
+        models.BidFeedback.created_at,
+        models.BidFeedback.id,
+        limit,
+        offset,
+        cursor,
     )
+    feedback = await fetch_dicts(db, query)
+    return feedback, next_cursor(feedback, "createdAt", limit)
+
+
+DECISION_QUORUM = 3
+
+
+async def submit_decision(
+    db: AsyncSession, bid_id: UUID, decision: str, username: str
+) -> models.Bid:
+    user = await get_employee(db, username)
     if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(
+            status_code=401, detail="User does not exist or is incorrect"
+        )
 
-    bid = db.query(models.Bid).filter(models.Bid.id == bid_id).first()
+    # Блокируется только предложение: параллельные решения по нему
+    # выполняются последовательно, а тендер закрывает воркер outbox
+    row = (
+        await db.execute(
+            select(models.Bid, models.Tender.organizationId)
+            .join(models.Tender, models.Tender.id == models.Bid.tender_id)
+            .where(models.Bid.id == bid_id)
+            .with_for_update(of=models.Bid)
+        )
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Bid not found")
+    bid, organization_id = row
+
+    if not await is_responsible(db, user.id, organization_id):
+        raise HTTPException(
+            status_code=403, detail="Insufficient rights to perform this action"
+        )
+
+    upsert = insert(models.BidDecision).values(
+        bid_id=bid.id, user_id=user.id, decision=decision
+    )
+    await db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=["bid_id", "user_id"],
+            set_={"decision": upsert.excluded.decision},
+        )
+    )
+
+    responsible_count = (
+        select(func.count())
+        .select_from(models.OrganizationResponsibility)
+        .where(models.OrganizationResponsibility.organization_id == organization_id)
+        .scalar_subquery()
+    )
+    rejected, approved, responsible = (
+        await db.execute(
+            select(
+                func.count().filter(models.BidDecision.decision == "Rejected"),
+                func.count().filter(models.BidDecision.decision == "Approved"),
+                responsible_count,
+            ).where(models.BidDecision.bid_id == bid.id)
+        )
+    ).one()
+
+    if rejected:
+        bid.status = "Rejected"
+    elif approved >= min(DECISION_QUORUM, responsible):
+        bid.status = "Approved"
+        outbox.enqueue(
+            db, "bid_approved", bidId=str(bid.id), tenderId=str(bid.tender_id)
+        )
+
+    await db.commit()
+    return bid
+
+
+@outbox.handler("bid_approved")
+async def close_tender_on_quorum(db: AsyncSession, payload: dict):
+    tender = await db.scalar(
+        select(models.Tender)
+        .where(models.Tender.id == UUID(payload["tenderId"]))
+        .with_for_update()
+    )
+    bid_status = await db.scalar(
+        select(models.Bid.status).where(models.Bid.id == UUID(payload["bidId"]))
+    )
+    # Предложение могли отменить до того, как воркер дошёл до события
+    if tender is None or tender.status == "Closed" or bid_status != "Approved":
+        return
+    tender.status = "Closed"
+    outbox.enqueue(db, "tender_lists_changed")
+
+
+@outbox.handler("tender_lists_changed")
+async def on_tender_lists_changed(db: AsyncSession, payload: dict):
+    await invalidate_tender_lists()
+
+
+@outbox.handler("feedback_created")
+async def notify_feedback(db: AsyncSession, payload: dict):
+    await events.notify(db, {"type": "feedback", **payload})
+
+
+async def rollback_tender(
+    db: AsyncSession, tender_id: str, version: int, username: str
+):
+    user = await get_employee(db, username)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    access = await get_tender_access(db, tender_id, user.id)
+    if not access:
+        raise HTTPException(status_code=404, detail="Tender not found")
+
+    if not access.is_owner:
+        raise HTTPException(
+            status_code=403, detail="Insufficient rights to perform this action"
+        )
+    tender = access.tender
+
+    if version >= tender.version:
+        raise HTTPException(
+            status_code=400, detail="Invalid version number for rollback"
+        )
+
+    snapshot = await db.get(models.TenderVersion, (tender.id, version))
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    await next_version(db, models.Tender, tender)
+    tender.name = snapshot.name
+    tender.description = snapshot.description
+    tender.serviceType = snapshot.serviceType
+    db.add(tender_version(tender))
+    await db.commit()
+    await invalidate_tender_lists()
+    await db.refresh(tender)
+
+    return tender
+
+
+async def rollback_bid(db: AsyncSession, bid_id: UUID, version: int, username: str):
+    user = await get_employee(db, username)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    bid = await db.scalar(select(models.Bid).where(models.Bid.id == bid_id))
     if not bid:
         raise HTTPException(status_code=404, detail="Bid not found")
 
+    if bid.author_id != user.id:
+        raise HTTPException(
+            status_code=403, detail="Insufficient rights to perform this action"
+        )
+
     if version >= bid.version:
         raise HTTPException(
             status_code=400, detail="Invalid version number for rollback"
         )
-    print(bid.version)
-    bid.version = version
-    db.commit()
-    db.refresh(bid)
-    print(bid.version)
 
-    return schemas.Bid(
-        id=bid.id,
-        name=bid.name,
-        description=bid.description,
-        tenderId=bid.tender_id,
-        status=bid.status,
-        version=bid.version,
-        createdAt=bid.created_at,
-        authorId=bid.author_id,
-        authorType="User",
-    )
+    snapshot = await db.get(models.BidVersion, (bid.id, version))
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    await next_version(db, models.Bid, bid)
+    bid.name = snapshot.name
+    bid.description = snapshot.description
+    db.add(bid_version(bid))
+    await db.commit()
+    await db.refresh(bid)
+
+    return bid_to_dict(bid)
@@ -1,20 +1,455 @@
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import ipaddress
+import itertools
 import os
+import time
+from typing import Optional
+
+from cache import TTLCache
+import diagnostics
+from metrics import (
+    PoolMetrics,
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    instrument_queries,
+)
 
 load_dotenv()
 
 POSTGRES_CONN = os.getenv("POSTGRES_CONN")
-engine = create_engine(POSTGRES_CONN)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# "async" — asyncpg + AsyncSession, "sync" — psycopg2 в пуле потоков
+DB_MODE = os.getenv("DB_MODE", "async")
+
+# Реплики для чтения через запятую; пусто — всё читается с основной БД
+REPLICA_CONNS = [
+    url.strip()
+    for url in os.getenv("POSTGRES_REPLICA_CONN", "").split(",")
+    if url.strip()
+]
+# Сколько секунд не использовать реплику после ошибки соединения
+REPLICA_RETRY = float(os.getenv("DB_REPLICA_RETRY", "30"))
+# Сколько секунд после записи клиент читает с основной БД
+READ_YOUR_WRITES = float(os.getenv("DB_READ_YOUR_WRITES", "5"))
+# Обратные прокси (адреса или подсети через запятую), которым можно верить
+# в X-Forwarded-For
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv("TRUSTED_PROXIES", "").split(",")
+    if network.strip()
+]
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Сколько соединений открыть при старте воркера
+POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(min(POOL_SIZE, 2))))
+# Таймаут проверки базы в /api/ready, секунд
+READY_TIMEOUT = float(os.getenv("DB_READY_TIMEOUT", "2"))
+
+pool_options = dict(
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_recycle=POOL_RECYCLE,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=POOL_PRE_PING,
+)
+
+
+def to_async_url(url: str) -> str:
+    for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix) :]
+    return url
+
+
+def to_sync_url(url: str) -> str:
+    # SQLAlchemy 2.0 не принимает устаревшую схему postgres://
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://") :]
+    return url
+
+
+# Движки создаются в init_engines(), а не при импорте: импорт модуля
+# (воркеры, миграции, скрипты) не требует доступной базы
+engine = None
+SessionLocal = None
+async_engine = None
+AsyncSessionLocal = None
+pool_metrics = {}
+
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+class SyncStreamResult:
+    """Аналог AsyncResult поверх серверного курсора синхронной сессии."""
+
+    def __init__(self, result):
+        self.result = result
+
+    def mappings(self):
+        return SyncStreamResult(self.result.mappings())
+
+    async def partitions(self, size=None):
+        while True:
+            partition = await run_in_threadpool(self.result.fetchmany, size)
+            if not partition:
+                break
+            yield partition
+
+    async def close(self):
+        await run_in_threadpool(self.result.close)
+
+
+class SyncNestedTransaction:
+    """async with над SAVEPOINT синхронной сессии."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.transaction = None
+
+    async def __aenter__(self):
+        self.transaction = await run_in_threadpool(self.session.begin_nested)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await run_in_threadpool(self.transaction.commit)
+        else:
+            await run_in_threadpool(self.transaction.rollback)
+
+
+class SyncSessionAdapter:
+    """Обёртка над синхронной Session с интерфейсом AsyncSession.
+
+    Позволяет crud и роутам работать одинаково в обоих режимах DB_MODE:
+    каждый блокирующий вызов уходит в пул потоков.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @property
+    def info(self):
+        return self.sync_session.info
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await run_in_threadpool(
+            self.sync_session.execute, statement, *args, **kwargs
+        )
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(
+            self.sync_session.scalar, statement, *args, **kwargs
+        )
+
+    async def scalars(self, statement, *args, **kwargs):
+        return await run_in_threadpool(
+            self.sync_session.scalars, statement, *args, **kwargs
+        )
+
+    async def stream(self, statement, *args, **kwargs):
+        statement = statement.execution_options(stream_results=True)
+        result = await run_in_threadpool(
+            self.sync_session.execute, statement, *args, **kwargs
+        )
+        return SyncStreamResult(result)
+
+    def begin_nested(self):
+        return SyncNestedTransaction(self.sync_session)
+
+    async def connection(self):
+        return await run_in_threadpool(self.sync_session.connection)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+class Replica:
+    """Реплика для чтения со своим пулом и пассивной проверкой здоровья.
+
+    Ошибка соединения выводит реплику из ротации на REPLICA_RETRY секунд,
+    после чего она снова получает запросы.
+    """
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.ejected_until = 0.0
+        self.metrics = PoolMetrics()
+        if DB_MODE == "async":
+            self.engine = create_async_engine(
+                to_async_url(url), poolclass=TimedAsyncAdaptedQueuePool, **pool_options
+            )
+            sync_engine = self.engine.sync_engine
+            self.sessionmaker = async_sessionmaker(
+                bind=self.engine, autoflush=False, expire_on_commit=False
+            )
+        else:
+            self.engine = create_engine(url, poolclass=TimedQueuePool, **pool_options)
+            sync_engine = self.engine
+            self.sessionmaker = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                expire_on_commit=False,
+                bind=self.engine,
+            )
+        self.metrics.instrument(sync_engine)
+        instrument_queries(sync_engine)
+        diagnostics.instrument(sync_engine)
+        event.listen(sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.eject()
+
+    def eject(self):
+        self.ejected_until = time.monotonic() + REPLICA_RETRY
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+    def session(self):
+        if DB_MODE == "async":
+            return self.sessionmaker()
+        return SyncSessionAdapter(self.sessionmaker())
+
+
+class ReplicaSet:
+    """Round-robin по здоровым репликам."""
+
+    def __init__(self, urls):
+        self.replicas = [Replica(f"replica-{i}", url) for i, url in enumerate(urls)]
+        self._counter = itertools.count()
+
+    def choose(self) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        start = next(self._counter)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+
+replicas = ReplicaSet([])
+# Клиенты, недавно выполнявшие запись: их чтения идут на основную БД,
+# чтобы не увидеть отставшую реплику
+recent_writers = TTLCache(maxsize=100_000, ttl=READ_YOUR_WRITES)
+
+
+def init_engines(sync: bool = False):
+    """Создаёт движок и пул режима DB_MODE и реплики; повторный вызов ничего не делает.
+
+    sync=True в режиме async дополнительно создаёт синхронный движок —
+    для скриптов, работающих с соединением напрямую (benchmarks/seed.py).
+    """
+    global engine, SessionLocal, async_engine, AsyncSessionLocal, replicas
+    first = (async_engine if DB_MODE == "async" else engine) is None
+
+    if (DB_MODE == "sync" or sync) and engine is None:
+        engine = create_engine(
+            to_sync_url(POSTGRES_CONN), poolclass=TimedQueuePool, **pool_options
+        )
+        pool_metrics["sync"] = PoolMetrics()
+        pool_metrics["sync"].instrument(engine)
+        instrument_queries(engine)
+        diagnostics.instrument(engine)
+        SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+        )
+
+    if DB_MODE == "async" and async_engine is None:
+        async_engine = create_async_engine(
+            to_async_url(POSTGRES_CONN),
+            poolclass=TimedAsyncAdaptedQueuePool,
+            **pool_options,
+        )
+        pool_metrics["async"] = PoolMetrics()
+        pool_metrics["async"].instrument(async_engine.sync_engine)
+        instrument_queries(async_engine.sync_engine)
+        diagnostics.instrument(async_engine.sync_engine)
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        )
+
+    if first:
+        replicas = ReplicaSet(REPLICA_CONNS)
+
+
+async def warm_up():
+    """Открывает POOL_WARMUP соединений заранее, чтобы первые запросы
+    после старта не ждали установки соединения."""
+
+    async def touch():
+        db = new_session()
+        try:
+            await db.execute(text("SELECT 1"))
+        finally:
+            await db.close()
+
+    await asyncio.gather(*(touch() for _ in range(POOL_WARMUP)))
+
+
+async def check_ready():
+    db = new_session()
     try:
-        yield db
+        await asyncio.wait_for(db.execute(text("SELECT 1")), READY_TIMEOUT)
     finally:
-        db.close()
+        await db.close()
+
+
+async def dispose():
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in replicas.replicas:
+        if DB_MODE == "async":
+            await replica.engine.dispose()
+        else:
+            replica.engine.dispose()
+    if engine is not None:
+        engine.dispose()
+
+
+def pool_status():
+    engines = {"sync": engine, "async": async_engine}
+    status = {
+        name: metrics.snapshot(engines[name].pool)
+        for name, metrics in pool_metrics.items()
+    }
+    for replica in replicas.replicas:
+        pool = replica.engine.pool
+        status[replica.name] = dict(
+            replica.metrics.snapshot(pool), healthy=replica.healthy
+        )
+    return status
+
+
+def new_session():
+    init_engines()
+    if DB_MODE == "async":
+        return AsyncSessionLocal()
+    return SyncSessionAdapter(SessionLocal())
+
+
+async def open_read_session():
+    """Сессия только для чтения: реплика, если есть здоровая, иначе основная БД.
+
+    Соединение берётся сразу, чтобы недоступная реплика была исключена
+    до выполнения запроса, а не посреди ответа.
+    """
+    init_engines()
+    for _ in replicas.replicas:
+        replica = replicas.choose()
+        if replica is None:
+            break
+        db = replica.session()
+        try:
+            await db.connection()
+            # Данные реплики могут отставать: по этой метке их не кэшируют
+            db.info["replica"] = replica.name
+            return db
+        except (DBAPIError, OSError):
+            replica.eject()
+            await db.close()
+    return new_session()
+
+
+def trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_address(request: Request) -> Optional[str]:
+    """Адрес клиента или None, если его нельзя установить.
+
+    За прокси все клиенты приходят с одного адреса: X-Forwarded-For
+    разбирается справа налево до первого недоверенного адреса. Если
+    заголовок прислал не доверенный прокси, адрес не используется.
+    """
+    host = request.client.host if request.client else None
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded:
+        return host
+    if not host or not trusted_proxy(host):
+        return None
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else None
+
+
+def writer_keys(request: Request):
+    keys = []
+    client = client_address(request)
+    if client:
+        keys.append("client:" + client)
+    for param in ("username", "creatorUsername", "requesterUsername"):
+        if param in request.query_params:
+            keys.append("user:" + request.query_params[param])
+    return keys
+
+
+async def get_db(request: Request):
+    db = new_session()
+    async with diagnostics.track(request):
+        try:
+            yield db
+        finally:
+            await db.close()
+            if request.method != "GET":
+                for key in writer_keys(request):
+                    recent_writers.set(key, True)
+
+
+async def get_read_db(request: Request):
+    """Сессия для GET-обработчиков с учётом read-your-writes."""
+    if any(recent_writers.get(key) for key in writer_keys(request)):
+        db = new_session()
+        db.info["recent_writer"] = True
+    else:
+        db = await open_read_session()
+    async with diagnostics.track(request):
+        try:
+            yield db
+        finally:
+            await db.close()
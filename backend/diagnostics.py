@@ -0,0 +1,127 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+# Режим диагностики для dev/staging: в продакшене выключен и ничего не стоит
+ENABLED = os.getenv("DB_DIAGNOSTICS", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+# Сколько раз один и тот же запрос может выполниться за HTTP-запрос
+REPEAT_THRESHOLD = int(os.getenv("DB_REPEAT_THRESHOLD", "5"))
+# Бюджет запросов на HTTP-запрос; 0 — без ограничения
+QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "0"))
+# Превышение бюджета — ошибка, а не предупреждение (для тестов)
+BUDGET_STRICT = os.getenv("DB_QUERY_BUDGET_STRICT", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+logger = logging.getLogger("db.diagnostics")
+
+_IN_LIST = re.compile(r"IN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """Текст запроса без различий в длине IN-списков и пробелах."""
+    return _SPACES.sub(" ", _IN_LIST.sub("IN (...)", statement)).strip()
+
+
+def short_repr(value, limit: int = 500) -> str:
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class QueryLog:
+    """Все запросы к БД в рамках одного HTTP-запроса."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.count = 0
+        self.shapes = Counter()
+
+    def record(self, statement: str, parameters, elapsed: float):
+        self.count += 1
+        self.shapes[statement_shape(statement)] += 1
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s; parameters=%s",
+                elapsed * 1000,
+                self.route,
+                statement_shape(statement),
+                short_repr(parameters),
+            )
+
+    def report(self):
+        for shape, times in self.shapes.items():
+            if times > REPEAT_THRESHOLD:
+                logger.warning(
+                    "Possible N+1 on %s: executed %d times: %s",
+                    self.route,
+                    times,
+                    shape,
+                )
+        if QUERY_BUDGET and self.count > QUERY_BUDGET:
+            message = (
+                f"{self.route} executed {self.count} queries, "
+                f"budget is {QUERY_BUDGET}"
+            )
+            if BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+
+current_log: ContextVar[Optional[QueryLog]] = ContextVar(
+    "current_query_log", default=None
+)
+
+
+def instrument(engine):
+    if not ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info["diagnostics_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - conn.info.pop("diagnostics_started")
+        log = current_log.get()
+        if log is not None:
+            log.record(statement, parameters, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute для упавшего запроса не вызывается
+        if context.connection is not None:
+            context.connection.info.pop("diagnostics_started", None)
+
+
+@asynccontextmanager
+async def track(request):
+    """Собирает запросы, выполненные в ходе HTTP-запроса, и выдаёт отчёт."""
+    if not ENABLED:
+        yield
+        return
+    route = request.scope.get("route")
+    log = QueryLog(
+        f"{request.method} {route.path if route is not None else request.url.path}"
+    )
+    token = current_log.set(log)
+    try:
+        yield
+    finally:
+        current_log.reset(token)
+        log.report()
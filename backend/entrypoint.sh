@@ -0,0 +1,10 @@
+#!/bin/sh
+set -e
+
+# Схема применяется до старта воркеров. Параллельные реплики ждут друг
+# друга, опрашивая advisory lock в migrations/env.py.
+if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+    alembic upgrade head
+fi
+
+exec "$@"
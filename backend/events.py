@@ -0,0 +1,277 @@
+"""Поток изменений статусов и версий тендеров и предложений.
+
+Изменения ловятся событиями маппера, поэтому попадают в поток из любого
+пути записи (смена статуса, решение, правка, откат). Пакетное создание
+вставляет строки в обход ORM и сообщает о них само (tenders_inserted,
+bids_inserted). Доставка:
+
+* local — события копятся в сессии и раздаются подписчикам процесса
+  после коммита (один узел);
+* postgres — pg_notify в той же транзакции, каждый процесс слушает канал
+  через LISTEN и раздаёт своим подписчикам.
+
+У каждого подписчика ограниченная очередь: если клиент не успевает
+читать, очередь сбрасывается, клиент получает событие resync
+и отключается — после переподключения он перечитывает состояние.
+"""
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+from typing import Iterable, List, Optional
+
+import orjson
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+BACKEND = os.getenv("EVENTS_BACKEND", "local")
+CHANNEL = os.getenv("EVENTS_CHANNEL", "status_events")
+BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "100"))
+MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000"))
+RECONNECT_DELAY = float(os.getenv("EVENTS_RECONNECT_DELAY", "5"))
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, tender_ids, bid_ids, organization_ids):
+        self.tender_ids = set(tender_ids)
+        self.bid_ids = set(bid_ids)
+        self.organization_ids = set(organization_ids)
+        self.queue = asyncio.Queue(maxsize=BUFFER_SIZE)
+        self.closed = False
+
+    def wants(self, payload: dict) -> bool:
+        return (
+            payload.get("tenderId") in self.tender_ids
+            or payload.get("organizationId") in self.organization_ids
+            or payload.get("bidId") in self.bid_ids
+        )
+
+    def push(self, payload: dict):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Клиент отстал: вместо неограниченного буфера — resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.closed = True
+            return
+        # После resync клиент переподключается, дальше ему не пишем
+        self.closed = payload is RESYNC
+
+
+class Broker:
+    """Раздача событий подписчикам в event loop приложения."""
+
+    def __init__(self):
+        self.subscriptions = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, subscription: Subscription) -> bool:
+        if len(self.subscriptions) >= MAX_SUBSCRIBERS:
+            return False
+        self.loop = asyncio.get_running_loop()
+        self.subscriptions.add(subscription)
+        return True
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    def publish(self, payload: dict):
+        """Можно вызывать из любого потока (коммит в режиме DB_MODE=sync)."""
+        if self.loop is None or not self.subscriptions:
+            return
+        if self._running_loop() is self.loop:
+            self._dispatch(payload)
+        else:
+            self.loop.call_soon_threadsafe(self._dispatch, payload)
+
+    @staticmethod
+    def _running_loop():
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def _dispatch(self, payload: dict):
+        self.published += 1
+        for subscription in list(self.subscriptions):
+            # resync (например, после обрыва LISTEN) не привязан к сущности
+            # и касается всех подписчиков
+            if payload is RESYNC or subscription.wants(payload):
+                subscription.push(payload)
+                if subscription.closed:
+                    self.dropped += 1
+                    self.unsubscribe(subscription)
+
+    def stats(self):
+        return {
+            "backend": BACKEND,
+            "subscribers": len(self.subscriptions),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+broker = Broker()
+
+
+def tender_payload(tender: models.Tender) -> dict:
+    return {
+        "type": "tender",
+        "id": str(tender.id),
+        "tenderId": str(tender.id),
+        "organizationId": str(tender.organizationId),
+        "status": tender.status,
+        "version": tender.version,
+    }
+
+
+def bid_payload(bid: models.Bid) -> dict:
+    return {
+        "type": "bid",
+        "id": str(bid.id),
+        "bidId": str(bid.id),
+        "tenderId": str(bid.tender_id),
+        "organizationId": str(bid.organization_id) if bid.organization_id else None,
+        "status": bid.status,
+        "version": bid.version,
+    }
+
+
+def changed(target) -> bool:
+    state = inspect(target)
+    return (
+        state.attrs.status.history.has_changes()
+        or state.attrs.version.history.has_changes()
+    )
+
+
+def notify_statement(payload: dict):
+    # NOTIFY доставляется только после коммита транзакции
+    return select(func.pg_notify(CHANNEL, orjson.dumps(payload).decode()))
+
+
+def emit(connection, target, payload: dict):
+    if BACKEND == "postgres":
+        connection.execute(notify_statement(payload))
+        return
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("pending_events", []).append(payload)
+
+
+async def notify(db, payload: dict):
+    """Событие не из маппера (например, новый отзыв) в транзакции db."""
+    if BACKEND == "postgres":
+        await db.execute(notify_statement(payload))
+    else:
+        db.info.setdefault("pending_events", []).append(payload)
+
+
+async def notify_many(db, payloads: List[dict]):
+    """Пачка событий в транзакции db одним запросом."""
+    if not payloads:
+        return
+    if BACKEND == "postgres":
+        await db.execute(
+            text(
+                "SELECT pg_notify(:channel, payload)"
+                " FROM unnest(CAST(:payloads AS text[])) AS payload"
+            ),
+            {
+                "channel": CHANNEL,
+                "payloads": [orjson.dumps(payload).decode() for payload in payloads],
+            },
+        )
+    else:
+        db.info.setdefault("pending_events", []).extend(payloads)
+
+
+async def tenders_inserted(db, rows: Iterable[dict]):
+    """События для тендеров, вставленных в обход ORM (пакетное создание)."""
+    await notify_many(db, [tender_payload(SimpleNamespace(**row)) for row in rows])
+
+
+async def bids_inserted(db, rows: Iterable[dict]):
+    """События для предложений, вставленных в обход ORM."""
+    await notify_many(db, [bid_payload(SimpleNamespace(**row)) for row in rows])
+
+
+@event.listens_for(models.Tender, "after_insert")
+@event.listens_for(models.Tender, "after_update")
+def tender_changed(mapper, connection, target):
+    if changed(target):
+        emit(connection, target, tender_payload(target))
+
+
+@event.listens_for(models.Bid, "after_insert")
+@event.listens_for(models.Bid, "after_update")
+def bid_changed(mapper, connection, target):
+    if changed(target):
+        emit(connection, target, bid_payload(target))
+
+
+# Оба события приходят и для точек сохранения: события публикуются и
+# сбрасываются только вместе с внешней транзакцией
+@event.listens_for(Session, "after_commit")
+def publish_pending(session):
+    if session.in_nested_transaction():
+        return
+    for payload in session.info.pop("pending_events", ()):
+        broker.publish(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_pending(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop("pending_events", None)
+
+
+def listen_dsn() -> str:
+    url = database.to_async_url(database.POSTGRES_CONN)
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def listen():
+    """LISTEN на канале событий с переподключением при обрыве."""
+    import asyncpg
+
+    def on_notify(connection, pid, channel, raw):
+        broker.publish(orjson.loads(raw))
+
+    while True:
+        try:
+            connection = await asyncpg.connect(listen_dsn())
+        except (OSError, asyncpg.PostgresError):
+            logger.exception("Event listener cannot connect, retrying")
+            await asyncio.sleep(RECONNECT_DELAY)
+            continue
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        try:
+            await connection.add_listener(CHANNEL, on_notify)
+            await lost.wait()
+        finally:
+            await connection.close()
+        # За время обрыва события могли потеряться
+        broker.publish(RESYNC)
+        await asyncio.sleep(RECONNECT_DELAY)
+
+
+def start() -> Optional[asyncio.Task]:
+    if BACKEND != "postgres":
+        return None
+    return asyncio.create_task(listen())
@@ -1,22 +1,58 @@
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi import FastAPI, Request
-import models
+import logging
+import bid_stats
 import database
-from routes import router
+import events
+import outbox
+from metrics import MetricsMiddleware, http_metrics
+from routes import internal_router, router
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схема создаётся отдельной командой (alembic upgrade head), воркер
+    # только открывает пул и прогревает соединения
+    database.init_engines()
+    try:
+        await database.warm_up()
+    except Exception:
+        logger.exception("Database warm-up failed, /api/ready will report it")
+    outbox.pool.start()
+    background = [task for task in (events.start(), bid_stats.start()) if task]
+    yield
+    await outbox.pool.stop()
+    for task in background:
+        task.cancel()
+    await database.dispose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
     return JSONResponse(
         status_code=500, content={"detail": "Сервер не готов обрабатывать запросы"}
     )
 
 
-models.Base.metadata.create_all(bind=database.engine)
-
 app.include_router(router, prefix="/api")
+app.include_router(internal_router, prefix="/api")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        http_metrics.render(), media_type="text/plain; version=0.0.4"
+    )
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,276 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (в секундах)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, n in zip(self.buckets + ("+Inf",), self.counts):
+                cumulative += n
+                buckets[str(bound)] = cumulative
+            return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+class PoolMetrics:
+    """Счётчики пула соединений, собираемые через события SQLAlchemy."""
+
+    def __init__(self):
+        self.wait_time = Histogram()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def instrument(self, engine):
+        event.listen(engine, "connect", lambda *a: self._incr("connects"))
+        event.listen(engine, "checkout", lambda *a: self._incr("checkouts"))
+        event.listen(engine, "checkin", lambda *a: self._incr("checkins"))
+        event.listen(engine, "invalidate", lambda *a: self._incr("invalidations"))
+        engine.pool.metrics = self
+
+    def snapshot(self, pool):
+        stats = {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "waitSeconds": self.wait_time.snapshot(),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checkedOut=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return stats
+
+
+class _TimedPoolMixin:
+    """Замеряет время ожидания свободного соединения в пуле.
+
+    В SQLAlchemy нет события "запрошено соединение", поэтому ожидание
+    меряется вокруг _do_get; сами счётчики идут через события.
+    """
+
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.wait_time.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class RequestStats:
+    """Запросы к БД в рамках одного HTTP-запроса."""
+
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+class HttpMetrics:
+    """Метрики HTTP-запросов в разрезе метода и шаблона пути."""
+
+    def __init__(self):
+        self.latency = {}
+        self.responses = {}
+        self.queries = {}
+        self.db_time = {}
+        self.query_time = Histogram()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, method, route, status, elapsed, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            status_key = key + (str(status),)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+            self.queries[key] = self.queries.get(key, 0) + stats.queries
+            self.db_time[key] = self.db_time.get(key, 0.0) + stats.db_time
+        histogram.observe(elapsed)
+
+    def render(self) -> str:
+        """Текстовый формат экспозиции Prometheus."""
+        lines = [
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            latency = list(self.latency.items())
+            responses = list(self.responses.items())
+            queries = list(self.queries.items())
+            db_time = list(self.db_time.items())
+            in_flight = self.in_flight
+        for (method, route), histogram in latency:
+            labels = f'method="{method}",route="{route}"'
+            lines.extend(
+                render_histogram("http_request_duration_seconds", labels, histogram)
+            )
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), count in responses:
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{route}",'
+                f'status="{status}"}} {count}'
+            )
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {in_flight}")
+        lines.append("# TYPE http_db_queries_total counter")
+        for (method, route), count in queries:
+            lines.append(
+                f'http_db_queries_total{{method="{method}",route="{route}"}} {count}'
+            )
+        lines.append("# TYPE http_db_seconds_total counter")
+        for (method, route), seconds in db_time:
+            lines.append(
+                f'http_db_seconds_total{{method="{method}",route="{route}"}} {seconds}'
+            )
+        lines.append("# TYPE db_query_duration_seconds histogram")
+        lines.extend(render_histogram("db_query_duration_seconds", "", self.query_time))
+        return "\n".join(lines) + "\n"
+
+
+def render_histogram(name: str, labels: str, histogram: Histogram):
+    snapshot = histogram.snapshot()
+    prefix = labels + "," if labels else ""
+    for bound, count in snapshot["buckets"].items():
+        yield f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+    suffix = "{" + labels + "}" if labels else ""
+    yield f"{name}_sum{suffix} {snapshot['sum']}"
+    yield f"{name}_count{suffix} {snapshot['count']}"
+
+
+http_metrics = HttpMetrics()
+
+
+def instrument_queries(engine):
+    """Считает запросы и время в БД для текущего HTTP-запроса."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - conn.info.pop("query_started")
+        http_metrics.query_time.observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute для упавшего запроса не вызывается
+        if context.connection is not None:
+            context.connection.info.pop("query_started", None)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: задержки, статусы, запросы в БД и заголовок Server-Timing."""
+
+    def __init__(self, app, metrics: HttpMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+                    f"total;dur={total:.1f}",
+                )
+            await send(message)
+
+        self.metrics.start()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            self.metrics.finish(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+                time.perf_counter() - started,
+                stats,
+            )
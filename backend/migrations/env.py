@@ -0,0 +1,80 @@
+import os
+import time
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool, text
+
+import database
+import models
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+# Ключ advisory lock, которым сериализуются параллельные upgrade
+LOCK_KEY = 7_351_002
+# Пауза между попытками взять его, секунды
+LOCK_POLL_INTERVAL = float(os.getenv("MIGRATIONS_LOCK_POLL_INTERVAL", "1"))
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=database.to_sync_url(database.POSTGRES_CONN),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def acquire_lock(connection) -> None:
+    """Ждёт advisory lock, не держа транзакцию открытой между попытками.
+
+    Блокирующий pg_advisory_lock ждал бы внутри транзакции, а CREATE INDEX
+    CONCURRENTLY у держателя lock ждёт завершения всех транзакций —
+    получалась взаимная блокировка.
+    """
+    while True:
+        locked = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY}
+        ).scalar()
+        connection.commit()
+        if locked:
+            return
+        time.sleep(LOCK_POLL_INTERVAL)
+
+
+def run_migrations_online() -> None:
+    connectable = create_engine(
+        database.to_sync_url(database.POSTGRES_CONN), poolclass=pool.NullPool
+    )
+
+    with connectable.connect() as connection:
+        # Реплики приложения запускают миграции при старте одновременно:
+        # остальные ждут первую и находят схему уже на head
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            acquire_lock(connection)
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata)
+
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if locked:
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY}
+                )
+                connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,119 @@
+"""initial schema
+
+Схема на момент перехода с create_all на миграции. Таблицы employee и
+organization по условию задания могут уже существовать, поэтому
+создаётся только то, чего в базе ещё нет. Базу, созданную раньше через
+create_all, достаточно пометить командой `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+organization_type = postgresql.ENUM(
+    "IE", "LLC", "JSC", name="organization_type", create_type=False
+)
+
+
+def _missing(table: str) -> bool:
+    if context.is_offline_mode():
+        return True
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    organization_type.create(op.get_bind(), checkfirst=True)
+
+    if _missing("employee"):
+        op.create_table(
+            "employee",
+            sa.Column("id", sa.UUID(), primary_key=True),
+            sa.Column("username", sa.String(50), nullable=False, unique=True),
+            sa.Column("first_name", sa.String(50)),
+            sa.Column("last_name", sa.String(50)),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if _missing("organization"):
+        op.create_table(
+            "organization",
+            sa.Column("id", sa.UUID(), primary_key=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("type", organization_type),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if _missing("tender"):
+        op.create_table(
+            "tender",
+            sa.Column("id", sa.UUID(), primary_key=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("organizationId", sa.UUID(), sa.ForeignKey("organization.id")),
+            sa.Column("creator_id", sa.UUID(), sa.ForeignKey("employee.id")),
+            sa.Column("serviceType", sa.String(50)),
+            sa.Column("status", sa.String(50)),
+            sa.Column("version", sa.Integer()),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if _missing("bid"):
+        op.create_table(
+            "bid",
+            sa.Column("id", sa.UUID(), primary_key=True, index=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("tender_id", sa.UUID(), sa.ForeignKey("tender.id")),
+            sa.Column("organization_id", sa.UUID(), sa.ForeignKey("organization.id")),
+            sa.Column("author_id", sa.UUID(), sa.ForeignKey("employee.id")),
+            sa.Column("status", sa.String(50)),
+            sa.Column("version", sa.Integer()),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if _missing("organization_responsibility"):
+        op.create_table(
+            "organization_responsibility",
+            sa.Column(
+                "user_id", sa.UUID(), sa.ForeignKey("employee.id"), primary_key=True
+            ),
+            sa.Column(
+                "organization_id",
+                sa.UUID(),
+                sa.ForeignKey("organization.id"),
+                primary_key=True,
+            ),
+        )
+
+    if _missing("bid_feedback"):
+        op.create_table(
+            "bid_feedback",
+            sa.Column("id", sa.UUID(), primary_key=True),
+            sa.Column("bid_id", sa.UUID(), sa.ForeignKey("bid.id")),
+            sa.Column("username", sa.String(50), nullable=False),
+            sa.Column("feedback", sa.Text(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("bid_feedback")
+    op.drop_table("organization_responsibility")
+    op.drop_table("bid")
+    op.drop_table("tender")
@@ -0,0 +1,49 @@
+"""composite indexes for listing and lookup queries
+
+Индексы повторяют фильтры и сортировки crud.py: (фильтр, ключ
+сортировки, id) под keyset-пагинацию. Строятся CONCURRENTLY, чтобы
+не блокировать запись в больших таблицах.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_tender_name_id", "tender", ["name", "id"]),
+    ("ix_tender_creator_id_name", "tender", ["creator_id", "name", "id"]),
+    ("ix_tender_service_type_name", "tender", ["serviceType", "name", "id"]),
+    ("ix_bid_tender_id_created_at", "bid", ["tender_id", "created_at", "id"]),
+    ("ix_bid_author_id_created_at", "bid", ["author_id", "created_at", "id"]),
+    ("ix_bid_feedback_bid_id", "bid_feedback", ["bid_id"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,64 @@
+"""tender and bid version history
+
+Append-only снимки редактируемых полей по (id сущности, версия).
+Для существующих строк текущее состояние записывается как снимок
+текущей версии.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tender_version",
+        sa.Column(
+            "tender_id",
+            sa.UUID(),
+            sa.ForeignKey("tender.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("version", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("serviceType", sa.String(50)),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "bid_version",
+        sa.Column(
+            "bid_id",
+            sa.UUID(),
+            sa.ForeignKey("bid.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("version", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.execute(
+        'INSERT INTO tender_version (tender_id, version, name, description, "serviceType") '
+        'SELECT id, COALESCE(version, 1), name, description, "serviceType" FROM tender'
+    )
+    op.execute(
+        "INSERT INTO bid_version (bid_id, version, name, description) "
+        "SELECT id, COALESCE(version, 1), name, description FROM bid"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bid_version")
+    op.drop_table("tender_version")
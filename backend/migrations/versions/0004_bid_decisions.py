@@ -0,0 +1,39 @@
+"""per-user bid decisions
+
+Решения ответственных по предложению: одна строка на пару
+(предложение, пользователь), по ним считается кворум.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bid_decision",
+        sa.Column(
+            "bid_id",
+            sa.UUID(),
+            sa.ForeignKey("bid.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("user_id", sa.UUID(), sa.ForeignKey("employee.id"), primary_key=True),
+        sa.Column("decision", sa.String(20), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bid_decision")
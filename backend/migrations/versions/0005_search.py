@@ -0,0 +1,86 @@
+"""full-text and trigram search over tenders and bids
+
+Генерируемая колонка search_vector (russian + english) с GIN-индексом
+и триграммный GIN-индекс по названию для нечёткого поиска. Добавление
+STORED-колонки переписывает таблицу под эксклюзивной блокировкой —
+на больших таблицах выполнять в окно обслуживания. Индексы строятся
+CONCURRENTLY.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["tender", "bid"]
+
+# Копия models.SEARCH_VECTOR на момент ревизии
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                sa.Computed(SEARCH_VECTOR, persisted=True),
+            ),
+        )
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f"ix_{table}_search_vector",
+                table,
+                ["search_vector"],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.create_index(
+                f"ix_{table}_name_trgm",
+                table,
+                ["name"],
+                postgresql_using="gin",
+                postgresql_ops={"name": "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in reversed(TABLES):
+            op.drop_index(
+                f"ix_{table}_name_trgm",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+            op.drop_index(
+                f"ix_{table}_search_vector",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    for table in reversed(TABLES):
+        op.drop_column(table, "search_vector")
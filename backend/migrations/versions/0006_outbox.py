@@ -0,0 +1,46 @@
+"""transactional outbox
+
+Отложенная работа (закрытие тендера по кворуму, сброс кэшей, рассылка
+уведомлений) записывается в outbox в той же транзакции, что и изменение,
+и разбирается фоновыми воркерами пачками через FOR UPDATE SKIP LOCKED.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column(
+            "available_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index("ix_outbox_available_at", "outbox", ["available_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_available_at", table_name="outbox")
+    op.drop_table("outbox")
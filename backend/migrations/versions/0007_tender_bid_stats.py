@@ -0,0 +1,59 @@
+"""per-tender bid counters
+
+Счётчики предложений тендера по статусам, которые приложение обновляет
+в транзакции изменения предложения. Таблица заполняется из bid одним
+проходом — на больших таблицах это полное чтение bid; расхождения,
+накопившиеся позже, исправляет сверка (bid_stats.reconcile).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUSES = ["Created", "Published", "Canceled", "Approved", "Rejected"]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tender_bid_stats",
+        sa.Column(
+            "tender_id",
+            sa.UUID(),
+            sa.ForeignKey("tender.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        *(
+            sa.Column(status.lower(), sa.Integer(), nullable=False, server_default="0")
+            for status in STATUSES
+        ),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    counters = ", ".join(
+        f"count(*) FILTER (WHERE initcap(status) = '{status}')" for status in STATUSES
+    )
+    columns = ", ".join(status.lower() for status in STATUSES)
+    op.execute(
+        f"""
+        INSERT INTO tender_bid_stats (tender_id, total, {columns})
+        SELECT tender_id, count(*), {counters}
+        FROM bid
+        WHERE tender_id IS NOT NULL
+        GROUP BY tender_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tender_bid_stats")
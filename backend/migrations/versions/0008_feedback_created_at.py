@@ -0,0 +1,63 @@
+"""bid feedback timestamps and keyset index
+
+created_at у отзывов и индекс (bid_id, created_at, id) под keyset-пагинацию
+отзывов предложения; он же заменяет индекс по одному bid_id. Значение по
+умолчанию now() не волатильно, поэтому ADD COLUMN не переписывает таблицу:
+существующие отзывы получают время миграции.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "bid_feedback",
+        sa.Column(
+            "created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_bid_feedback_bid_id_created_at",
+            "bid_feedback",
+            ["bid_id", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_bid_feedback_bid_id",
+            table_name="bid_feedback",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_bid_feedback_bid_id",
+            "bid_feedback",
+            ["bid_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_bid_feedback_bid_id_created_at",
+            table_name="bid_feedback",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("bid_feedback", "created_at")
@@ -1,10 +1,52 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Text, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Column,
+    Computed,
+    Integer,
+    String,
+    ForeignKey,
+    Enum,
+    Text,
+    DateTime,
+    Index,
+    event,
+)
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from database import Base
 
+# Поисковый вектор по названию (вес A) и описанию (вес B) сразу в русской
+# и английской конфигурациях: язык текста заранее неизвестен
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+# Триграммные индексы требуют расширения pg_trgm
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def search_indexes(table: str):
+    return (
+        Index(f"ix_{table}_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            f"ix_{table}_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
 
 class Employee(Base):
     __tablename__ = "employee"
@@ -28,6 +70,12 @@ class Organization(Base):
 
 class Tender(Base):
     __tablename__ = "tender"
+    __table_args__ = (
+        Index("ix_tender_name_id", "name", "id"),
+        Index("ix_tender_creator_id_name", "creator_id", "name", "id"),
+        Index("ix_tender_service_type_name", "serviceType", "name", "id"),
+        *search_indexes("tender"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
     description = Column(Text)
@@ -38,10 +86,17 @@ class Tender(Base):
     version = Column(Integer, default=1)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
+    # Нужен только в WHERE поиска, ORM-объекты его не загружают
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
 
 
 class Bid(Base):
     __tablename__ = "bid"
+    __table_args__ = (
+        Index("ix_bid_tender_id_created_at", "tender_id", "created_at", "id"),
+        Index("ix_bid_author_id_created_at", "author_id", "created_at", "id"),
+        *search_indexes("bid"),
+    )
     id = Column(UUID, primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
     description = Column(Text)
@@ -52,9 +107,46 @@ class Bid(Base):
     version = Column(Integer, default=1)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
+    # Нужен только в WHERE поиска, ORM-объекты его не загружают
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
     feedbacks = relationship("BidFeedback", back_populates="bid")
 
 
+class TenderVersion(Base):
+    __tablename__ = "tender_version"
+    tender_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("tender.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    description = Column(Text)
+    serviceType = Column(String(50))
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class BidVersion(Base):
+    __tablename__ = "bid_version"
+    bid_id = Column(
+        UUID(as_uuid=True), ForeignKey("bid.id", ondelete="CASCADE"), primary_key=True
+    )
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    description = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class BidDecision(Base):
+    __tablename__ = "bid_decision"
+    bid_id = Column(
+        UUID(as_uuid=True), ForeignKey("bid.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("employee.id"), primary_key=True)
+    decision = Column(String(20), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
 class OrganizationResponsibility(Base):
     __tablename__ = "organization_responsibility"
     user_id = Column(UUID(as_uuid=True), ForeignKey("employee.id"), primary_key=True)
@@ -65,9 +157,49 @@ class OrganizationResponsibility(Base):
 
 class BidFeedback(Base):
     __tablename__ = "bid_feedback"
+    __table_args__ = (
+        Index("ix_bid_feedback_bid_id_created_at", "bid_id", "created_at", "id"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     bid_id = Column(UUID(as_uuid=True), ForeignKey("bid.id"))
     username = Column(String(50), nullable=False)
     feedback = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
 
     bid = relationship("Bid", back_populates="feedbacks")
+
+
+class TenderBidStats(Base):
+    """Счётчики предложений тендера по статусам (bid_stats.py)."""
+
+    __tablename__ = "tender_bid_stats"
+    tender_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("tender.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    total = Column(Integer, nullable=False, default=0)
+    created = Column(Integer, nullable=False, default=0)
+    published = Column(Integer, nullable=False, default=0)
+    canceled = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class OutboxEvent(Base):
+    """Отложенная работа, записанная в одной транзакции с изменением.
+
+    Разбирается фоновыми воркерами (outbox.py); обработанные строки
+    удаляются, неудачные откладываются до available_at.
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (Index("ix_outbox_available_at", "available_at", "id"),)
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -0,0 +1,188 @@
+"""Транзакционный outbox и пул фоновых воркеров.
+
+Изменение записывает строку outbox (enqueue) в своей транзакции, а
+производная работа выполняется после коммита воркерами, а не внутри
+запроса. Строки забираются пачками через FOR UPDATE SKIP LOCKED, поэтому
+воркеры нескольких процессов не мешают друг другу. Каждое событие
+обрабатывается в своём SAVEPOINT: ошибка откладывает только его
+с экспоненциальной задержкой, после OUTBOX_MAX_ATTEMPTS попыток строка
+остаётся в таблице для ручного разбора.
+"""
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import database
+import models
+
+WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "300"))
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, dict], Awaitable[None]]
+handlers: Dict[str, Handler] = {}
+
+
+def handler(kind: str):
+    """Регистрирует обработчик событий вида kind."""
+
+    def register(func: Handler) -> Handler:
+        handlers[kind] = func
+        return func
+
+    return register
+
+
+def enqueue(db: AsyncSession, kind: str, **payload):
+    """Добавляет событие в текущую транзакцию; значения — JSON-совместимые."""
+    db.add(models.OutboxEvent(kind=kind, payload=payload))
+    db.info["outbox_pending"] = True
+
+
+async def enqueue_many(db: AsyncSession, kind: str, payloads: List[dict]):
+    """Пакетный enqueue одной вставкой — для пакетных операций."""
+    if not payloads:
+        return
+    await db.execute(
+        insert(models.OutboxEvent),
+        [{"kind": kind, "payload": payload} for payload in payloads],
+    )
+    db.info["outbox_pending"] = True
+
+
+class WorkerPool:
+    def __init__(self):
+        self.tasks: List[asyncio.Task] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.processed = 0
+        self.failed = 0
+
+    def start(self, workers: int = WORKERS):
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.tasks = [asyncio.create_task(self.run(n)) for n in range(workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.loop = None
+
+    def wake(self):
+        """Будит воркеров после коммита; коммит может быть в другом потоке."""
+        if self.loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.wakeup.set()
+        else:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def run(self, number: int):
+        while True:
+            self.wakeup.clear()
+            try:
+                claimed = await self.drain()
+            except Exception:
+                logger.exception("Outbox worker %d failed to drain a batch", number)
+                claimed = 0
+            if claimed < BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain(self) -> int:
+        """Обрабатывает одну пачку и возвращает число забранных строк."""
+        db = database.new_session()
+        try:
+            rows = (
+                await db.scalars(
+                    select(models.OutboxEvent)
+                    .where(
+                        models.OutboxEvent.available_at <= func.now(),
+                        models.OutboxEvent.attempts < MAX_ATTEMPTS,
+                    )
+                    .order_by(models.OutboxEvent.id)
+                    .limit(BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+            done = []
+            for row in rows:
+                # События упавшего обработчика откатываются вместе с его
+                # точкой сохранения, события остальных уходят при commit
+                pending = list(db.info.get("pending_events", ()))
+                try:
+                    async with db.begin_nested():
+                        await handlers[row.kind](db, row.payload)
+                except Exception as exc:
+                    db.info["pending_events"] = pending
+                    logger.exception("Outbox event %s (%s) failed", row.id, row.kind)
+                    self.failed += 1
+                    row.attempts += 1
+                    row.last_error = repr(exc)[:1000]
+                    row.available_at = func.now() + timedelta(
+                        seconds=min(2**row.attempts, MAX_BACKOFF)
+                    )
+                else:
+                    done.append(row.id)
+            if done:
+                await db.execute(
+                    delete(models.OutboxEvent)
+                    .where(models.OutboxEvent.id.in_(done))
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+            self.processed += len(done)
+            return len(rows)
+        finally:
+            await db.close()
+
+    def stats(self):
+        return {
+            "workers": len(self.tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+pool = WorkerPool()
+
+
+async def backlog(db: AsyncSession) -> dict:
+    pending, dead = (
+        await db.execute(
+            select(
+                func.count().filter(models.OutboxEvent.attempts < MAX_ATTEMPTS),
+                func.count().filter(models.OutboxEvent.attempts >= MAX_ATTEMPTS),
+            )
+        )
+    ).one()
+    return {"pending": pending, "dead": dead}
+
+
+@event.listens_for(Session, "after_commit")
+def wake_workers(session):
+    if session.info.pop("outbox_pending", False):
+        pool.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_pending(session):
+    session.info.pop("outbox_pending", None)
@@ -1,24 +1,404 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, HTTPException, Body
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    Query,
+    HTTPException,
+    Body,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import csv
+import hashlib
+import hmac
+import io
+import os
+import orjson
+import bid_stats
 import crud
+import events
+import outbox
 import schemas
 import database
-from typing import List, Optional
-from models import Tender, Employee, Bid, OrganizationResponsibility, BidFeedback
+from typing import Dict, List, Optional, Union
+from models import Tender, Bid
 
 router = APIRouter()
 
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+
+async def require_internal_token(
+    token: str = Header("", alias="X-Internal-Token"),
+):
+    # Без INTERNAL_API_TOKEN служебные ручки недоступны никому
+    if not INTERNAL_API_TOKEN or not hmac.compare_digest(
+        token.encode(), INTERNAL_API_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Internal API token required")
+
+
+# Состояние пулов, кэшей и очередей — не для внешних клиентов
+internal_router = APIRouter(
+    prefix="/internal", dependencies=[Depends(require_internal_token)]
+)
+
+
+def etag_in(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """Есть ли etag в списке из If-None-Match (weak) или If-Match."""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    if weak:
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+    return "*" in tags or etag in tags
+
+
+def entity_etag(entity) -> str:
+    # Версия растёт при правке и откате, updated_at — при любом UPDATE,
+    # включая смену статуса
+    updated = entity.updated_at
+    stamp = int(updated.timestamp() * 1_000_000) if updated else 0
+    return f'"{entity.version}-{stamp:x}"'
+
+
+def entity_headers(entity) -> dict:
+    headers = {"ETag": entity_etag(entity)}
+    modified = entity.updated_at or entity.created_at
+    if modified:
+        headers["Last-Modified"] = format_datetime(
+            modified.replace(tzinfo=timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def entity_response(request: Request, response: Response, entity):
+    """Проставляет ETag/Last-Modified; при совпадении If-None-Match — 304."""
+    headers = entity_headers(entity)
+    if etag_in(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+async def next_version(request: Request, db: AsyncSession, model, entity):
+    """Следующая версия для правки: с If-Match конфликт — 412, без него — 409."""
+    header = request.headers.get("if-match")
+    if header is None:
+        await crud.next_version(db, model, entity)
+        return
+    if not etag_in(header, entity_etag(entity), weak=False) or not (
+        await crud.claim_version(db, model, entity)
+    ):
+        raise HTTPException(
+            status_code=412, detail="Resource was modified, reload and retry"
+        )
+    entity.version += 1
+
+
+def json_default(value):
+    # asyncpg (DB_MODE=async) отдаёт id как asyncpg.pgproto.pgproto.UUID —
+    # подкласс UUID, который orjson сам не сериализует
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value) -> bytes:
+    return orjson.dumps(value, default=json_default)
+
+
+class JSONResponse(ORJSONResponse):
+    """ORJSONResponse с сериализацией через dumps."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def list_response(
+    request: Request, rows: List[dict], next_cursor: Optional[str] = None
+):
+    # Строки уже в форме ответа: повторная валидация response_model
+    # не нужна, сериализуем сразу через orjson
+    body = dumps(rows)
+    headers = {"ETag": f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag_in(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def iter_bulk_items(request: Request):
+    """Элементы пакетного запроса: JSON-массив или поток NDJSON.
+
+    Строки NDJSON отдаются байтами и разбираются при валидации, чтобы
+    битая строка стала ошибкой элемента, а не всего запроса.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/x-ndjson"):
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        items = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    for index, item in enumerate(items):
+        yield index, item
+
+
+async def bulk_create(request: Request, db: AsyncSession, schema, create_batch):
+    created, errors, batch = [], [], []
+
+    async def flush():
+        batch_created, batch_errors = await create_batch(db, batch)
+        created.extend(batch_created)
+        errors.extend(batch_errors)
+        batch.clear()
+
+    async for index, item in iter_bulk_items(request):
+        try:
+            if isinstance(item, bytes):
+                batch.append((index, schema.model_validate_json(item)))
+            else:
+                batch.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            detail = "; ".join(
+                f"{'.'.join(map(str, e['loc']))}: {e['msg']}" if e["loc"] else e["msg"]
+                for e in exc.errors()
+            )
+            errors.append({"index": index, "detail": detail})
+        if len(batch) >= crud.BULK_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    errors.sort(key=lambda e: e["index"])
+    return JSONResponse({"created": created, "errors": errors})
+
+
+EXPORT_FORMATS = ["ndjson", "csv"]
+
+
+async def ndjson_chunks(partitions):
+    async for rows in partitions:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def csv_chunks(partitions, columns: List[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([csv_value(row[c]) for c in columns] for row in rows)
+        yield buffer.getvalue()
+
+
+def export_response(query, format: str, filename: str):
+    partitions = crud.stream_rows(query)
+    if format == "csv":
+        columns = [column.name for column in query.selected_columns]
+        return StreamingResponse(
+            csv_chunks(partitions, columns),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+        )
+    return StreamingResponse(
+        ndjson_chunks(partitions), media_type="application/x-ndjson"
+    )
+
+
+EVENTS_KEEPALIVE = 15.0
+
+
+async def subscribe_events(
+    db: AsyncSession,
+    username: str,
+    tender_ids: List[UUID],
+    bid_ids: List[UUID],
+    organization_ids: List[UUID],
+) -> events.Subscription:
+    if not await crud.get_employee(db, username):
+        raise HTTPException(status_code=401, detail="User not found")
+    if not (tender_ids or bid_ids or organization_ids):
+        raise HTTPException(
+            status_code=400, detail="Specify tenderId, bidId or organizationId"
+        )
+    subscription = events.Subscription(
+        map(str, tender_ids), map(str, bid_ids), map(str, organization_ids)
+    )
+    if not events.broker.subscribe(subscription):
+        raise HTTPException(status_code=503, detail="Too many subscribers")
+    return subscription
+
+
+async def next_event(subscription: events.Subscription) -> Optional[dict]:
+    """Следующее событие или None, если пора отправить keepalive."""
+    try:
+        return await asyncio.wait_for(subscription.queue.get(), EVENTS_KEEPALIVE)
+    except asyncio.TimeoutError:
+        return None
+
+
+async def sse_frames(subscription: events.Subscription):
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            payload = await next_event(subscription)
+            if payload is None:
+                yield b": keepalive\n\n"
+                continue
+            yield b"event: %s\ndata: %s\n\n" % (
+                payload["type"].encode(),
+                orjson.dumps(payload),
+            )
+            if payload is events.RESYNC:
+                return
+    finally:
+        events.broker.unsubscribe(subscription)
+
 
 @router.get("/ping")
-def ping():
+async def ping():
     return "ok"
 
 
-@router.get("/tenders", response_model=List[schemas.TenderSchema])
-def list_tenders(
-    db: Session = Depends(database.get_db),
+@router.get("/ready")
+async def ready():
+    # В отличие от /ping проверяет, что база отвечает
+    try:
+        await database.check_ready()
+    except (DBAPIError, OSError, asyncio.TimeoutError):
+        raise HTTPException(status_code=503, detail="Database is unavailable")
+    return {"status": "ready"}
+
+
+@internal_router.get("/pool")
+async def pool_status():
+    return database.pool_status()
+
+
+@internal_router.get("/cache")
+async def cache_status():
+    return {
+        "employees": crud.employee_cache.stats(),
+        "responsibilities": crud.responsibility_cache.stats(),
+        "tenderLists": crud.tender_list_cache.stats(),
+    }
+
+
+@internal_router.get("/outbox")
+async def outbox_status(db: AsyncSession = Depends(database.get_db)):
+    return {**outbox.pool.stats(), **await outbox.backlog(db)}
+
+
+@internal_router.post("/bid-stats/reconcile")
+async def reconcile_bid_stats():
+    repaired = await bid_stats.reconcile_exclusive()
+    if repaired is None:
+        raise HTTPException(status_code=409, detail="Reconciliation is running")
+    return {"repaired": repaired}
+
+
+@internal_router.get("/events")
+async def events_status():
+    return events.broker.stats()
+
+
+@router.get("/events")
+async def stream_events(
+    username: str = Query(..., description="Пользователь, который подписывается"),
+    tenderId: List[UUID] = Query([], description="Тендеры и предложения по ним"),
+    bidId: List[UUID] = Query([], description="Предложения"),
+    organizationId: List[UUID] = Query(
+        [], description="Тендеры и предложения организаций"
+    ),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    # Сессия закрывается до начала потока: подписка не держит соединение с БД
+    subscription = await subscribe_events(db, username, tenderId, bidId, organizationId)
+    return StreamingResponse(
+        sse_frames(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/events/ws")
+async def stream_events_ws(
+    websocket: WebSocket,
+    username: str = Query(...),
+    tenderId: List[UUID] = Query([]),
+    bidId: List[UUID] = Query([]),
+    organizationId: List[UUID] = Query([]),
+):
+    db = await database.open_read_session()
+    try:
+        subscription = await subscribe_events(
+            db, username, tenderId, bidId, organizationId
+        )
+    except HTTPException as exc:
+        await websocket.close(code=1008, reason=exc.detail)
+        return
+    finally:
+        await db.close()
+
+    await websocket.accept()
+    try:
+        while True:
+            payload = await next_event(subscription)
+            if payload is None:
+                payload = {"type": "keepalive"}
+            await websocket.send_text(orjson.dumps(payload).decode())
+            if payload is events.RESYNC:
+                await websocket.close(code=1013)
+                return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+@router.get("/tenders", response_model=List[schemas.TenderWithStats])
+async def list_tenders(
+    request: Request,
+    db: AsyncSession = Depends(database.get_read_db),
     limit: int = Query(
         5, ge=0, le=50, description="Максимальное число возвращаемых объектов"
     ),
@@ -26,99 +406,221 @@ def list_tenders(
     service_type: Optional[List[str]] = Query(
         None, description="Фильтрация по типам услуг"
     ),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"
+    ),
+    with_stats: bool = Query(False, description="Добавить счётчики предложений"),
 ):
-    tenders = crud.get_tenders(
-        db=db, limit=limit, offset=offset, service_type=service_type
+    tenders, next_cursor = await crud.get_tenders(
+        db=db, limit=limit, offset=offset, service_type=service_type, cursor=cursor
     )
-    return tenders
+    if with_stats:
+        tenders = await bid_stats.with_stats(db, tenders)
+    return list_response(request, tenders, next_cursor)
 
 
 @router.post("/tenders/new", response_model=schemas.TenderSchema)
-def create_tender(tender: schemas.TenderCreate, db: Session = Depends(database.get_db)):
-    return crud.create_tender(
+async def create_tender(
+    tender: schemas.TenderCreate, db: AsyncSession = Depends(database.get_db)
+):
+    return await crud.create_tender(
         db=db, tender=tender, creator_username=tender.creatorUsername
     )
 
 
-@router.get("/tenders/my", response_model=List[schemas.TenderSchema])
-def get_user_tenders(
+@router.post("/tenders/bulk", response_model=schemas.BulkCreateResult)
+async def bulk_create_tenders(
+    request: Request, db: AsyncSession = Depends(database.get_db)
+):
+    return await bulk_create(
+        request, db, schemas.TenderCreate, crud.bulk_create_tenders
+    )
+
+
+@router.get("/tenders/export")
+async def export_tenders(
+    format: str = Query("ndjson", enum=EXPORT_FORMATS),
+    service_type: Optional[List[str]] = Query(
+        None, description="Фильтрация по типам услуг"
+    ),
+    status: Optional[List[str]] = Query(None, description="Фильтрация по статусам"),
+    created_from: Optional[datetime] = Query(None, description="Создан не раньше"),
+    created_to: Optional[datetime] = Query(None, description="Создан раньше"),
+):
+    query = crud.tender_export_query(
+        service_type=service_type,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return export_response(query, format, "tenders")
+
+
+@router.get("/tenders/search", response_model=List[schemas.TenderSearchResult])
+async def search_tenders(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос"),
+    limit: int = Query(
+        5, ge=0, le=50, description="Максимальное число возвращаемых объектов"
+    ),
+    service_type: Optional[List[str]] = Query(
+        None, description="Фильтрация по типам услуг"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"
+    ),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    tenders, next_cursor = await crud.search_tenders(
+        db=db, text=q, limit=limit, service_type=service_type, cursor=cursor
+    )
+    return list_response(request, tenders, next_cursor)
+
+
+MULTI_GET_IDS = Body(
+    ...,
+    min_length=1,
+    max_length=crud.MULTI_GET_LIMIT,
+    description="Идентификаторы, не больше MULTI_GET_LIMIT",
+)
+
+
+def unique(ids: List[UUID]) -> List[UUID]:
+    return list(dict.fromkeys(ids))
+
+
+@router.post(
+    "/tenders/statuses",
+    response_model=Dict[str, Union[schemas.EntityStatus, schemas.MultiGetError]],
+)
+async def get_tender_statuses(
+    ids: List[UUID] = MULTI_GET_IDS,
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    return JSONResponse(await crud.get_tenders_by_ids(db, unique(ids)))
+
+
+@router.post(
+    "/tenders/lookup",
+    response_model=Dict[str, Union[schemas.TenderSchema, schemas.MultiGetError]],
+)
+async def lookup_tenders(
+    ids: List[UUID] = MULTI_GET_IDS,
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    return JSONResponse(await crud.get_tenders_by_ids(db, unique(ids), full=True))
+
+
+@router.get("/tenders/my", response_model=List[schemas.TenderWithStats])
+async def get_user_tenders(
+    request: Request,
     username: str,
     limit: int = Query(
         5, ge=0, le=50, description="Максимальное число возвращаемых объектов"
     ),
     offset: int = Query(0, ge=0, description="Количество пропущенных объектов"),
-    db: Session = Depends(database.get_db),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"
+    ),
+    with_stats: bool = Query(False, description="Добавить счётчики предложений"),
+    db: AsyncSession = Depends(database.get_read_db),
 ):
-    tenders = crud.get_tenders_by_user(
-        db=db, username=username, limit=limit, offset=offset
+    tenders, next_cursor = await crud.get_tenders_by_user(
+        db=db, username=username, limit=limit, offset=offset, cursor=cursor
     )
     if not tenders:
         raise HTTPException(
             status_code=404, detail="No tenders found for the specified user"
         )
-    return tenders
+    if with_stats:
+        tenders = await bid_stats.with_stats(db, tenders)
+    return list_response(request, tenders, next_cursor)
+
+
+@router.get("/tenders/{tenderId}/stats", response_model=schemas.TenderBidStats)
+async def get_tender_stats(
+    tenderId: UUID,
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    stats = await bid_stats.get_stats(db, [tenderId])
+    if tenderId not in stats and not await db.scalar(
+        select(Tender.id).where(Tender.id == tenderId)
+    ):
+        raise HTTPException(status_code=404, detail="Tender not found")
+    return stats.get(tenderId, bid_stats.EMPTY)
 
 
 @router.get("/tenders/{tenderId}/status", response_model=str)
-def get_tender_status(tenderId: str, db: Session = Depends(database.get_db)):
-    tender = db.query(Tender).filter(Tender.id == tenderId).first()
+async def get_tender_status(
+    tenderId: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    tender = await db.scalar(select(Tender).where(Tender.id == tenderId))
     if not tender:
         raise HTTPException(status_code=404, detail="Tender not found")
 
-    return tender.status
+    return entity_response(request, response, tender) or tender.status
 
 
 VALID_STATUSES = ["Created", "Published", "Closed"]
 
 
 @router.put("/tenders/{tenderId}/status", response_model=schemas.TenderSchema)
-def update_tender_status(
+async def update_tender_status(
     tenderId: str,
     status: str = Query(..., description="Статус тендера", enum=VALID_STATUSES),
     username: str = Query(..., description="Пользователь, который обновляет статус"),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
+    user = await crud.get_employee(db, username)
     if not user:
         raise HTTPException(
             status_code=401, detail="Пользователь не существует или некорректен"
         )
 
-    tender = db.query(Tender).filter(Tender.id == tenderId).first()
-    if not tender:
+    access = await crud.get_tender_access(db, tenderId, user.id)
+    if not access:
         raise HTTPException(status_code=404, detail="Тендер не найден")
 
-    if tender.creator_id != user.id:
+    if not access.is_owner:
         raise HTTPException(
             status_code=403, detail="Недостаточно прав для выполнения действия"
         )
+    tender = access.tender
 
     tender.status = status
-    db.commit()
-    db.refresh(tender)
+    await db.commit()
+    await crud.invalidate_tender_lists()
+    await db.refresh(tender)
 
     return tender
 
 
 @router.patch("/tenders/{tenderId}/edit", response_model=schemas.TenderSchema)
-def edit_tender(
+async def edit_tender(
     tenderId: str,
+    request: Request,
+    response: Response,
     username: str = Query(..., description="Username of the person editing the tender"),
     tender_update: schemas.TenderUpdate = Depends(),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
+    user = await crud.get_employee(db, username)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    tender = db.query(Tender).filter(Tender.id == tenderId).first()
-    if not tender:
+    access = await crud.get_tender_access(db, tenderId, user.id)
+    if not access:
         raise HTTPException(status_code=404, detail="Tender not found")
 
-    if tender.creator_id != user.id:
+    if not access.is_owner:
         raise HTTPException(
             status_code=403, detail="Insufficient rights to perform this action"
         )
+    tender = access.tender
+    await next_version(request, db, Tender, tender)
 
     if tender_update.name:
         tender.name = tender_update.name
@@ -126,134 +628,195 @@ def edit_tender(
         tender.description = tender_update.description
     if tender_update.serviceType:
         tender.serviceType = tender_update.serviceType
-    if tender_update.version:
-        tender.version = tender_update.version
+    db.add(crud.tender_version(tender))
 
-    db.commit()
-    db.refresh(tender)
+    await db.commit()
+    await crud.invalidate_tender_lists()
+    await db.refresh(tender)
 
+    response.headers.update(entity_headers(tender))
     return tender
 
 
 @router.put(
     "/tenders/{tenderId}/rollback/{version}", response_model=schemas.TenderSchema
 )
-def rollback_tender(
+async def rollback_tender(
     tenderId: str,
     version: int,
     username: str = Query(
         ..., description="Username of the person performing the rollback"
     ),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    return await crud.rollback_tender(
+        db=db, tender_id=tenderId, version=version, username=username
+    )
 
-    tender = db.query(Tender).filter(Tender.id == tenderId).first()
-    if not tender:
-        raise HTTPException(status_code=404, detail="Tender not found")
 
-    if tender.creator_id != user.id:
-        raise HTTPException(
-            status_code=403, detail="Insufficient rights to perform this action"
-        )
+@router.post("/bids/new", response_model=schemas.Bid)
+async def create_bid(
+    bid: schemas.BidCreate, db: AsyncSession = Depends(database.get_db)
+):
+    return await crud.create_bid(db=db, bid_data=bid)
 
-    if version >= tender.version:
-        raise HTTPException(
-            status_code=400, detail="Invalid version number for rollback"
-        )
 
-    tender.version = version
+@router.post("/bids/bulk", response_model=schemas.BulkCreateResult)
+async def bulk_create_bids(
+    request: Request, db: AsyncSession = Depends(database.get_db)
+):
+    return await bulk_create(request, db, schemas.BidCreate, crud.bulk_create_bids)
 
-    db.commit()
-    db.refresh(tender)
 
-    return tender
+@router.get("/bids/export")
+async def export_bids(
+    username: str,
+    format: str = Query("ndjson", enum=EXPORT_FORMATS),
+    status: Optional[List[str]] = Query(None, description="Фильтрация по статусам"),
+    created_from: Optional[datetime] = Query(None, description="Создано не раньше"),
+    created_to: Optional[datetime] = Query(None, description="Создано раньше"),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    query = await crud.bid_export_query(
+        db,
+        username=username,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return export_response(query, format, "bids")
 
 
-@router.post("/bids/new", response_model=schemas.Bid)
-def create_bid(bid: schemas.BidCreate, db: Session = Depends(database.get_db)):
-    return crud.create_bid(db=db, bid_data=bid)
+@router.get("/bids/search", response_model=List[schemas.BidSearchResult])
+async def search_bids(
+    request: Request,
+    username: str,
+    q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос"),
+    limit: int = Query(
+        5, ge=0, le=50, description="Максимальное число возвращаемых объектов"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"
+    ),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    bids, next_cursor = await crud.search_bids(
+        db=db, username=username, text=q, limit=limit, cursor=cursor
+    )
+    return list_response(request, bids, next_cursor)
+
+
+@router.post(
+    "/bids/statuses",
+    response_model=Dict[str, Union[schemas.EntityStatus, schemas.MultiGetError]],
+)
+async def get_bid_statuses(
+    username: str = Query(..., description="Пользователь, запрашивающий статусы"),
+    ids: List[UUID] = MULTI_GET_IDS,
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    return JSONResponse(await crud.get_bids_by_ids(db, username, unique(ids)))
+
+
+@router.post(
+    "/bids/lookup",
+    response_model=Dict[str, Union[schemas.Bid, schemas.MultiGetError]],
+)
+async def lookup_bids(
+    username: str = Query(..., description="Пользователь, запрашивающий предложения"),
+    ids: List[UUID] = MULTI_GET_IDS,
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    return JSONResponse(
+        await crud.get_bids_by_ids(db, username, unique(ids), full=True)
+    )
 
 
 @router.get("/bids/my", response_model=List[schemas.Bid])
-def get_user_bids(
+async def get_user_bids(
+    request: Request,
     username: str,
     limit: int = Query(
         5, ge=0, le=50, description="Максимальное число возвращаемых объектов"
     ),
     offset: int = Query(0, ge=0, description="Количество пропущенных объектов"),
-    db: Session = Depends(database.get_db),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"
+    ),
+    db: AsyncSession = Depends(database.get_read_db),
 ):
-    bids = crud.get_bids_by_user(db=db, username=username, limit=limit, offset=offset)
+    bids, next_cursor = await crud.get_bids_by_user(
+        db=db, username=username, limit=limit, offset=offset, cursor=cursor
+    )
     if not bids:
         raise HTTPException(
             status_code=404, detail="No bids found for the specified user"
         )
-    return bids
+    return list_response(request, bids, next_cursor)
 
 
 @router.get("/bids/{tenderId}/list", response_model=List[schemas.Bid])
-def list_bids_for_tender(
+async def list_bids_for_tender(
+    request: Request,
     tenderId: str,
     username: str,
     limit: int = Query(
         5, ge=0, le=50, description="Максимальное число возвращаемых объектов"
     ),
     offset: int = Query(0, ge=0, description="Количество пропущенных объектов"),
-    db: Session = Depends(database.get_db),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"
+    ),
+    db: AsyncSession = Depends(database.get_read_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
+    user = await crud.get_employee(db, username)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    tender = db.query(Tender).filter(Tender.id == tenderId).first()
-    if not tender:
-        raise HTTPException(status_code=404, detail="Tender not found")
-
-    bids = crud.get_bids_for_tender(
-        db=db, tender_id=tenderId, limit=limit, offset=offset
+    bids, next_cursor = await crud.get_bids_for_tender(
+        db=db, tender_id=tenderId, limit=limit, offset=offset, cursor=cursor
     )
-    return bids
+    return list_response(request, bids, next_cursor)
 
 
 @router.get("/bids/{bidId}/status", response_model=str)
-def get_bid_status(
+async def get_bid_status(
     bidId: UUID,
+    request: Request,
+    response: Response,
     username: str = Query(
         ..., description="Username of the person requesting the status"
     ),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_read_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
+    user = await crud.get_employee(db, username)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    bid = db.query(Bid).filter(Bid.id == bidId).first()
+    bid = await db.scalar(select(Bid).where(Bid.id == bidId))
     if not bid:
         raise HTTPException(status_code=404, detail="Bid not found")
 
-    return bid.status
+    return entity_response(request, response, bid) or bid.status
 
 
 VALID_BID_STATUSES = ["Created", "Published", "Canceled", "Approved", "Rejected"]
 
 
 @router.put("/bids/{bidId}/status", response_model=schemas.BidStatusResponse)
-def update_bid_status(
+async def update_bid_status(
     bidId: UUID,
     status: str = Query(..., description="Статус предложения", enum=VALID_BID_STATUSES),
     username: str = Query(..., description="Пользователь, который обновляет статус"),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
+    user = await crud.get_employee(db, username)
     if not user:
         raise HTTPException(
             status_code=401, detail="Пользователь не существует или некорректен"
         )
 
-    bid = db.query(Bid).filter(Bid.id == bidId).first()
+    bid = await db.scalar(select(Bid).where(Bid.id == bidId))
     if not bid:
         raise HTTPException(status_code=404, detail="Предложение не найдено")
 
@@ -263,24 +826,26 @@ def update_bid_status(
         )
 
     bid.status = status
-    db.commit()
-    db.refresh(bid)
+    await db.commit()
+    await db.refresh(bid)
 
     return schemas.BidStatusResponse(status=bid.status)
 
 
 @router.patch("/bids/{bidId}/edit", response_model=schemas.Bid)
-def edit_bid(
+async def edit_bid(
     bidId: UUID,
     bid_update: schemas.BidUpdate,
+    request: Request,
+    response: Response,
     username: str = Query(..., description="Username of the person editing the bid"),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
+    user = await crud.get_employee(db, username)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    bid = db.query(Bid).filter(Bid.id == bidId).first()
+    bid = await db.scalar(select(Bid).where(Bid.id == bidId))
     if not bid:
         raise HTTPException(status_code=404, detail="Bid not found")
 
@@ -288,30 +853,23 @@ def edit_bid(
         raise HTTPException(
             status_code=403, detail="Insufficient rights to perform this action"
         )
+    await next_version(request, db, Bid, bid)
 
     if bid_update.name:
         bid.name = bid_update.name
     if bid_update.description:
         bid.description = bid_update.description
+    db.add(crud.bid_version(bid))
 
-    db.commit()
-    db.refresh(bid)
-
-    return schemas.Bid(
-        id=bid.id,
-        name=bid.name,
-        description=bid.description,
-        tenderId=bid.tender_id,
-        status=bid.status,
-        version=bid.version,
-        createdAt=bid.created_at,
-        authorId=bid.author_id,
-        authorType="User",
-    )
+    await db.commit()
+    await db.refresh(bid)
+
+    response.headers.update(entity_headers(bid))
+    return crud.bid_to_dict(bid)
 
 
 @router.put("/bids/{bidId}/submit_decision", response_model=schemas.Bid)
-def submit_decision(
+async def submit_decision(
     bidId: UUID,
     decision: str = Query(
         ..., description="Decision on the bid", enum=["Approved", "Rejected"]
@@ -319,74 +877,26 @@ def submit_decision(
     username: str = Query(
         ..., description="Username of the person submitting the decision"
     ),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    user = db.query(Employee).filter(Employee.username == username).first()
-    if not user:
-        raise HTTPException(
-            status_code=401, detail="User does not exist or is incorrect"
-        )
-
-    bid = db.query(Bid).filter(Bid.id == bidId).first()
-    if not bid:
-        raise HTTPException(status_code=404, detail="Bid not found")
-
-    tender = db.query(Tender).filter(Tender.id == bid.tender_id).first()
-    if not tender:
-        raise HTTPException(status_code=404, detail="Tender not found")
-
-    organization_responsibility = (
-        db.query(OrganizationResponsibility)
-        .filter(
-            OrganizationResponsibility.user_id == user.id,
-            OrganizationResponsibility.organization_id == bid.organization_id,
-        )
-        .first()
+    bid = await crud.submit_decision(
+        db=db, bid_id=bidId, decision=decision, username=username
     )
 
-    if not organization_responsibility:
-        raise HTTPException(
-            status_code=403, detail="Insufficient rights to perform this action"
-        )
-
-    if decision == "Approved":
-        bid.status = "Approved"
-        if all(
-            b.status == "Approved"
-            for b in db.query(Bid).filter(Bid.tender_id == bid.tender_id).all()
-        ):
-            tender.status = "Closed"
-            db.commit()
-    elif decision == "Rejected":
-        bid.status = "Rejected"
-
-    db.commit()
-    db.refresh(bid)
-
-    return schemas.Bid(
-        id=bid.id,
-        name=bid.name,
-        description=bid.description,
-        tenderId=bid.tender_id,
-        status=bid.status,
-        version=bid.version,
-        createdAt=bid.created_at,
-        authorId=bid.author_id,
-        authorType="User",
-    )
+    return crud.bid_to_dict(bid)
 
 
 @router.put("/bids/{bidId}/feedback", response_model=schemas.BidFeedbackCreate)
-def submit_bid_feedback(
+async def submit_bid_feedback(
     bidId: UUID,
     username: str = Query(...),
     feedback: str = Body(..., embed=True),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
     feedback_data = schemas.BidFeedbackCreate(
         username=username, feedback=feedback, bidId=bidId
     )
-    feedback = crud.create_feedback(
+    feedback = await crud.create_feedback(
         db=db, bidId=bidId, feedback_data=feedback_data, username=username
     )
     return schemas.BidFeedbackCreate(
@@ -394,22 +904,56 @@ def submit_bid_feedback(
     )
 
 
+@router.post("/bids/feedback/bulk", response_model=schemas.BulkCreateResult)
+async def bulk_submit_feedback(
+    request: Request, db: AsyncSession = Depends(database.get_db)
+):
+    return await bulk_create(
+        request, db, schemas.BidFeedbackCreate, crud.bulk_create_feedback
+    )
+
+
+@router.get("/bids/{bidId}/feedback", response_model=List[schemas.BidFeedback])
+async def list_bid_feedback(
+    bidId: UUID,
+    request: Request,
+    username: str = Query(..., description="Username of the person requesting"),
+    limit: int = Query(
+        5, ge=0, le=50, description="Maximum number of objects to return"
+    ),
+    offset: int = Query(
+        0, ge=0, description="Number of objects to skip from the beginning"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Next page cursor (X-Next-Cursor header)"
+    ),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    feedback, next_cursor = await crud.get_bid_feedback(
+        db, bidId, username, limit=limit, offset=offset, cursor=cursor
+    )
+    return list_response(request, feedback, next_cursor)
+
+
 @router.put("/bids/{bidId}/rollback/{version}", response_model=schemas.Bid)
-def rollback_bid(
+async def rollback_bid(
     bidId: UUID,
     version: int,
     username: str = Query(
         ..., description="Username of the person performing the rollback"
     ),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    bid = crud.rollback_bid(db=db, bid_id=bidId, version=version, username=username)
+    bid = await crud.rollback_bid(
+        db=db, bid_id=bidId, version=version, username=username
+    )
     return bid
 
 
-@router.get("/bids/{tenderId}/reviews", response_model=List[schemas.BidFeedbackCreate])
-def get_bid_reviews(
+@router.get("/bids/{tenderId}/reviews", response_model=List[schemas.BidFeedback])
+async def get_bid_reviews(
     tenderId: UUID,
+    request: Request,
     authorUsername: str,
     requesterUsername: str,
     limit: int = Query(
@@ -418,59 +962,34 @@ def get_bid_reviews(
     offset: int = Query(
         0, ge=0, description="Number of objects to skip from the beginning"
     ),
-    db: Session = Depends(database.get_db),
+    cursor: Optional[str] = Query(
+        None, description="Next page cursor (X-Next-Cursor header)"
+    ),
+    db: AsyncSession = Depends(database.get_read_db),
 ):
-    requester = (
-        db.query(Employee).filter(Employee.username == requesterUsername).first()
-    )
+    requester = await crud.get_employee(db, requesterUsername)
     if not requester:
         raise HTTPException(status_code=401, detail="Requester user not found")
 
-    author = db.query(Employee).filter(Employee.username == authorUsername).first()
+    author = await crud.get_employee(db, authorUsername)
     if not author:
         raise HTTPException(status_code=401, detail="Author user not found")
 
-    tender = db.query(Tender).filter(Tender.id == tenderId).first()
-    if not tender:
+    access = await crud.get_tender_access(db, tenderId, requester.id)
+    if not access:
         raise HTTPException(status_code=404, detail="Tender not found")
 
-    org_responsibility = (
-        db.query(OrganizationResponsibility)
-        .filter(
-            OrganizationResponsibility.user_id == requester.id,
-            OrganizationResponsibility.organization_id == tender.organizationId,
-        )
-        .first()
-    )
-
-    if not org_responsibility:
+    if not access.is_responsible:
         raise HTTPException(
             status_code=403, detail="Insufficient rights to view reviews"
         )
 
-    bids = (
-        db.query(Bid)
-        .filter(Bid.tender_id == tenderId, Bid.author_id == author.id)
-        .all()
-    )
-    bid_ids = [bid.id for bid in bids]
-
-    if not bid_ids:
-        raise HTTPException(
-            status_code=404, detail="No bids found for the specified author and tender"
-        )
-
-    reviews = (
-        db.query(BidFeedback)
-        .filter(BidFeedback.bid_id.in_(bid_ids))
-        .offset(offset)
-        .limit(limit)
-        .all()
+    reviews, next_cursor = await crud.get_author_reviews(
+        db,
+        tender_id=tenderId,
+        author_id=author.id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
     )
-
-    return [
-        schemas.BidFeedbackCreate(
-            bidId=review.bid_id, username=review.username, feedback=review.feedback
-        )
-        for review in reviews
-    ]
+    return list_response(request, reviews, next_cursor)
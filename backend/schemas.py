@@ -1,7 +1,7 @@
 from enum import Enum
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -34,11 +34,23 @@ class TenderSchema(BaseModel):
         allow_population_by_field_name = True
 
 
+class TenderBidStats(BaseModel):
+    total: int = 0
+    created: int = 0
+    published: int = 0
+    canceled: int = 0
+    approved: int = 0
+    rejected: int = 0
+
+
+class TenderWithStats(TenderSchema):
+    bidStats: Optional[TenderBidStats] = None
+
+
 class TenderUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     description: Optional[str] = Field(None, max_length=500)
     serviceType: Optional[str] = Field(None, max_length=50, alias="serviceType")
-    version: Optional[int] = Field(None, description="Version of the tender")
 
     class Config:
         orm_mode = True
@@ -79,6 +91,14 @@ class Bid(BaseModel):
         allow_population_by_field_name = True
 
 
+class TenderSearchResult(TenderSchema):
+    rank: float
+
+
+class BidSearchResult(Bid):
+    rank: float
+
+
 class BidStatusResponse(BaseModel):
     status: str
 
@@ -100,3 +120,36 @@ class BidFeedbackCreate(BaseModel):
     class Config:
         orm_mode = True
         allow_population_by_field_name = True
+
+
+class BidFeedback(BaseModel):
+    id: UUID
+    bidId: UUID
+    username: str
+    feedback: str
+    createdAt: datetime
+
+
+class BulkCreated(BaseModel):
+    index: int
+    id: UUID
+
+
+class BulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkCreateResult(BaseModel):
+    created: List[BulkCreated]
+    errors: List[BulkError]
+
+
+class EntityStatus(BaseModel):
+    id: UUID
+    status: str
+    version: int
+
+
+class MultiGetError(BaseModel):
+    error: Literal["not_found", "forbidden"]
@@ -0,0 +1,88 @@
+"""Общие фикстуры тестов.
+
+Тесты API идут против настоящего PostgreSQL из TEST_POSTGRES_CONN: схема
+public в этой базе пересоздаётся и накатывается миграциями. Без
+переменной такие тесты пропускаются. Драйвер выбирается DB_MODE, как
+в приложении (по умолчанию async, asyncpg).
+"""
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+TEST_POSTGRES_CONN = os.getenv("TEST_POSTGRES_CONN")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if TEST_POSTGRES_CONN:
+    # До импорта database: строка подключения читается при импорте
+    os.environ["POSTGRES_CONN"] = TEST_POSTGRES_CONN
+    os.environ["POSTGRES_REPLICA_CONN"] = ""
+    os.environ["TENDER_LIST_CACHE_SIZE"] = "0"
+    # QueryLog из diagnostics нужен тестам числа запросов
+    os.environ["DB_DIAGNOSTICS"] = "true"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    if not TEST_POSTGRES_CONN:
+        pytest.skip("TEST_POSTGRES_CONN is not set")
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, text
+
+    import database
+
+    engine = create_engine(database.to_sync_url(TEST_POSTGRES_CONN))
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE"))
+        connection.execute(text("CREATE SCHEMA public"))
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(config, "head")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def org(engine):
+    """Организация с ответственным сотрудником и сотрудником-автором."""
+    from sqlalchemy import insert
+
+    import models
+
+    suffix = uuid.uuid4().hex[:8]
+    org = SimpleNamespace(
+        id=uuid.uuid4(),
+        owner=f"owner_{suffix}",
+        author=f"author_{suffix}",
+    )
+    owner_id, author_id = uuid.uuid4(), uuid.uuid4()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.Organization).values(id=org.id, name=f"org {suffix}")
+        )
+        connection.execute(
+            insert(models.Employee),
+            [
+                {"id": owner_id, "username": org.owner},
+                {"id": author_id, "username": org.author},
+            ],
+        )
+        connection.execute(
+            insert(models.OrganizationResponsibility).values(
+                user_id=owner_id, organization_id=org.id
+            )
+        )
+    return org
@@ -0,0 +1,123 @@
+"""Курсорная пагинация списков: те же строки, что и с offset, и 400 на битый курсор."""
+import pytest
+
+PAGE = 3
+COUNT = 7
+
+
+@pytest.fixture
+def lists(client, org):
+    """Тендеры, предложения и отзывы одной организации; пути списков к ним."""
+
+    def post(method, url, **kwargs):
+        response = client.request(method, url, **kwargs)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    tenders = [
+        post(
+            "POST",
+            "/api/tenders/new",
+            json={
+                "name": f"Tender {i}",
+                "description": "pagination",
+                "serviceType": "Delivery",
+                "organizationId": str(org.id),
+                "creatorUsername": org.owner,
+                "status": "Published",
+            },
+        )
+        for i in range(COUNT)
+    ]
+    tender_id = tenders[0]["id"]
+    bids = [
+        post(
+            "POST",
+            "/api/bids/new",
+            json={
+                "name": f"Bid {i}",
+                "description": "pagination",
+                "tenderId": tender_id,
+                "organizationId": str(org.id),
+                "creatorUsername": org.author,
+            },
+        )
+        for i in range(COUNT)
+    ]
+    bid_id = bids[0]["id"]
+    for i in range(COUNT):
+        post(
+            "PUT",
+            f"/api/bids/{bid_id}/feedback",
+            params={"username": org.owner},
+            json={"feedback": f"feedback {i}"},
+        )
+
+    return {
+        "my_tenders": ("/api/tenders/my", {"username": org.owner}),
+        "my_bids": ("/api/bids/my", {"username": org.author}),
+        "tender_bids": (f"/api/bids/{tender_id}/list", {"username": org.owner}),
+        "bid_feedback": (f"/api/bids/{bid_id}/feedback", {"username": org.owner}),
+        "reviews": (
+            f"/api/bids/{tender_id}/reviews",
+            {"authorUsername": org.author, "requesterUsername": org.owner},
+        ),
+    }
+
+
+def offset_pages(client, path, params):
+    pages = []
+    for offset in range(0, COUNT, PAGE):
+        response = client.get(path, params={**params, "limit": PAGE, "offset": offset})
+        assert response.status_code == 200, response.text
+        pages.append([row["id"] for row in response.json()])
+    return pages
+
+
+def cursor_pages(client, path, params):
+    pages, cursor = [], None
+    while True:
+        query = {**params, "limit": PAGE}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(path, params=query)
+        assert response.status_code == 200, response.text
+        rows = [row["id"] for row in response.json()]
+        if rows:
+            pages.append(rows)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize(
+    "name", ["my_tenders", "my_bids", "tender_bids", "bid_feedback", "reviews"]
+)
+def test_cursor_pages_match_offset_pages(client, lists, name):
+    path, params = lists[name]
+    expected = offset_pages(client, path, params)
+    assert [len(page) for page in expected] == [3, 3, 1]
+    assert cursor_pages(client, path, params) == expected
+
+
+@pytest.mark.parametrize(
+    "name", ["my_tenders", "my_bids", "tender_bids", "bid_feedback", "reviews"]
+)
+@pytest.mark.parametrize(
+    "cursor", ["garbage", "W10", "WyJub3QgYSBkYXRlIiwgIm5vdCBhIHV1aWQiXQ"]
+)
+def test_invalid_cursor_is_rejected(client, lists, name, cursor):
+    path, params = lists[name]
+    response = client.get(path, params={**params, "limit": PAGE, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_cursor_with_offset_is_rejected(client, lists):
+    path, params = lists["my_tenders"]
+    first = client.get(path, params={**params, "limit": PAGE})
+    cursor = first.headers["x-next-cursor"]
+    response = client.get(
+        path, params={**params, "limit": PAGE, "cursor": cursor, "offset": PAGE}
+    )
+    assert response.status_code == 400
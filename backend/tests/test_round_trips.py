@@ -0,0 +1,104 @@
+"""Число SQL-запросов на эндпоинт: доступ проверяется в том же запросе, что и выборка.
+
+Считаются запросы одного HTTP-запроса по QueryLog из diagnostics, фоновые
+задачи приложения в счёт не попадают. Границы рассчитаны на холодный кэш
+сотрудников: с тёплым запросов меньше.
+"""
+import pytest
+
+import diagnostics
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Число запросов в каждом завершившемся HTTP-запросе, по порядку."""
+    counts = []
+    report = diagnostics.QueryLog.report
+
+    def record(log):
+        counts.append(log.count)
+        report(log)
+
+    monkeypatch.setattr(diagnostics.QueryLog, "report", record)
+    return counts
+
+
+@pytest.fixture
+def bid(client, org):
+    tender = client.post(
+        "/api/tenders/new",
+        json={
+            "name": "Round trips",
+            "description": "round trips",
+            "serviceType": "Delivery",
+            "organizationId": str(org.id),
+            "creatorUsername": org.owner,
+        },
+    ).json()
+    bid = client.post(
+        "/api/bids/new",
+        json={
+            "name": "Round trips",
+            "description": "round trips",
+            "tenderId": tender["id"],
+            "organizationId": str(org.id),
+            "creatorUsername": org.author,
+        },
+    ).json()
+    return bid
+
+
+def count(client, queries, method, url, **kwargs):
+    queries.clear()
+    response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+    (statements,) = queries
+    return statements
+
+
+def test_update_tender_status(client, org, bid, queries):
+    # Сотрудник, тендер вместе с признаком ответственности, UPDATE
+    statements = count(
+        client,
+        queries,
+        "PUT",
+        f"/api/tenders/{bid['tenderId']}/status",
+        params={"status": "Published", "username": org.owner},
+    )
+    assert statements <= 3
+
+
+def test_edit_tender(client, org, bid, queries):
+    # Сотрудник, тендер с признаком, захват версии, снимок в историю, UPDATE
+    statements = count(
+        client,
+        queries,
+        "PATCH",
+        f"/api/tenders/{bid['tenderId']}/edit",
+        params={"username": org.owner, "name": "Edited"},
+    )
+    assert statements <= 5
+
+
+def test_list_bids_for_tender(client, org, bid, queries):
+    # Сотрудник, затем доступ и сами предложения одним запросом
+    statements = count(
+        client,
+        queries,
+        "GET",
+        f"/api/bids/{bid['tenderId']}/list",
+        params={"username": org.owner},
+    )
+    assert statements <= 2
+
+
+def test_get_bid_reviews(client, org, bid, queries):
+    # Два сотрудника, тендер с признаком, отзывы через JOIN без списка id
+    statements = count(
+        client,
+        queries,
+        "GET",
+        f"/api/bids/{bid['tenderId']}/reviews",
+        params={"authorUsername": org.author, "requesterUsername": org.owner},
+    )
+    assert statements <= 4
@@ -0,0 +1,55 @@
+"""Сериализация ответов с id в том виде, в каком их отдаёт asyncpg."""
+import asyncio
+import uuid
+
+import orjson
+import pytest
+from starlette.requests import Request
+
+import routes
+
+pgproto = pytest.importorskip("asyncpg.pgproto.pgproto")
+
+
+def asyncpg_uuid() -> uuid.UUID:
+    return pgproto.UUID(uuid.uuid4().bytes)
+
+
+def test_asyncpg_uuid_needs_default():
+    # Если orjson научится сам, json_default можно будет убрать
+    with pytest.raises(TypeError):
+        orjson.dumps(asyncpg_uuid())
+
+
+def test_list_response():
+    value = asyncpg_uuid()
+    request = Request({"type": "http", "headers": []})
+    response = routes.list_response(request, [{"id": value}], next_cursor="abc")
+    assert orjson.loads(response.body) == [{"id": str(value)}]
+    assert response.headers["x-next-cursor"] == "abc"
+
+
+def test_json_response():
+    value = asyncpg_uuid()
+    response = routes.JSONResponse({str(value): {"id": value}})
+    assert orjson.loads(response.body) == {str(value): {"id": str(value)}}
+
+
+def test_ndjson_chunks():
+    values = [asyncpg_uuid(), asyncpg_uuid()]
+
+    async def partitions():
+        yield [{"id": value} for value in values]
+
+    async def collect():
+        return [chunk async for chunk in routes.ndjson_chunks(partitions())]
+
+    (chunk,) = asyncio.run(collect())
+    assert [orjson.loads(line) for line in chunk.splitlines()] == [
+        {"id": str(value)} for value in values
+    ]
+
+
+def test_unknown_types_still_fail():
+    with pytest.raises(TypeError):
+        routes.dumps({"value": object()})
@@ -0,0 +1,74 @@
+"""Кэш публичного списка тендеров при отстающей реплике."""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+import cache
+import crud
+import database
+
+# Имя сортируется раньше остальных тендеров, новый тендер — на первой странице
+NAME = "0000 cache"
+PAGE = {"limit": 5}
+# Адрес клиента за недоверенным прокси не известен: это не тот клиент, что писал
+OTHER_CLIENT = {"X-Forwarded-For": "203.0.113.7"}
+
+
+@pytest.fixture
+def list_cache(monkeypatch):
+    monkeypatch.setattr(crud, "tender_list_cache", cache.LocalResponseCache(64, 60))
+
+
+@pytest.fixture
+def lagging_replica(client, monkeypatch):
+    """Реплика, застрявшая на снимке данных до следующей записи."""
+
+    async def open_snapshot():
+        db = database.new_session()
+        await db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+        await db.execute(text("SELECT 1"))
+        return db
+
+    snapshot = client.portal.call(open_snapshot)
+    replica = SimpleNamespace(
+        name="lagging", session=lambda: snapshot, eject=lambda: None
+    )
+    monkeypatch.setattr(
+        database,
+        "replicas",
+        SimpleNamespace(replicas=[replica], choose=lambda: replica),
+    )
+    yield
+    client.portal.call(snapshot.close)
+
+
+def page_ids(client, **kwargs):
+    response = client.get("/api/tenders", params=PAGE, **kwargs)
+    assert response.status_code == 200, response.text
+    return [tender["id"] for tender in response.json()]
+
+
+def test_replica_page_is_not_cached(
+    client, org, list_cache, lagging_replica, monkeypatch
+):
+    tender = client.post(
+        "/api/tenders/new",
+        json={
+            "name": NAME,
+            "description": "cache",
+            "serviceType": "Delivery",
+            "organizationId": str(org.id),
+            "creatorUsername": org.owner,
+        },
+    ).json()
+
+    # Другой клиент читает с отстающей реплики и видит страницу без тендера
+    assert tender["id"] not in page_ids(client, headers=OTHER_CLIENT)
+
+    # Автор записи читает основную БД мимо кэша
+    assert tender["id"] in page_ids(client)
+
+    # Страница с реплики не попала в кэш и не достанется остальным
+    monkeypatch.setattr(database, "replicas", database.ReplicaSet([]))
+    assert tender["id"] in page_ids(client, headers=OTHER_CLIENT)